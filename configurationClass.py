@@ -10,9 +10,18 @@ from configurationClassErrors import *
 import edgeAttributes
 from edgeAttributes import *
 
+import fileLifecycle
+from fileLifecycle import *
+
 import fileOperations
 from fileOperations import *
 
+import iterationEngine
+from iterationEngine import *
+
+import iterationGraph
+from iterationGraph import *
+
 import parameterSets
 from parameterSets import *
 
@@ -22,13 +31,28 @@ from nodeAttributes import *
 import pipelineAttributes
 from pipelineAttributes import *
 
+import preflight
+from preflight import *
+
+import runtimeHistory
+from runtimeHistory import *
+
+import streamFusion
+from streamFusion import *
+
 import toolAttributes
 from toolAttributes import *
 
+import hashlib
+import heapq
 import json
 import os
 import sys
 
+# Define the version of the graph snapshot. This must be incremented whenever the data structures
+# stored in the snapshot, or the way in which the graph is built, change.
+graphSnapshotVersion = 1
+
 class configurationMethods:
   def __init__(self):
 
@@ -36,6 +60,9 @@ class configurationMethods:
     self.edgeMethods = edgeClass()
     self.nodeMethods = nodeClass()
 
+    # Define methods for iterating over the data sets in the graph.
+    self.iterations = iterationEngine(self.nodeMethods, self.edgeMethods)
+
     # Define a class for handling parameter sets.
     self.parameterSets = parameterSetConfiguration()
 
@@ -58,6 +85,14 @@ class configurationMethods:
 
     self.nodeIDs = {}
 
+    # Store the file lifecycle index, built once the workflow is fixed, along with the graph, workflow and
+    # version of the graph it was built from.
+    self.fileLifecycle    = None
+    self.fileLifecycleKey = None
+
+    # Store the status of files checked before the pipeline is run, so that they are not checked again.
+    self.fileStatuses = fileStatusCache()
+
   # Build a graph for an individual task.  The pipeline is built by merging nodes between
   # different tasks.  This step is performed later.
   def buildTaskGraph(self, graph, tasks):
@@ -164,7 +199,7 @@ class configurationMethods:
             for fileNodeID in self.nodeMethods.getAssociatedFileNodeIDs(graph, sourceNodeID):
               attributes                   = deepcopy(graph[targetNodeIDs[0]][targetTask]['attributes'])
               attributes.isOriginatingEdge = True
-              graph.add_edge(fileNodeID, targetTask, attributes = attributes)
+              self.nodeMethods.addGraphEdge(graph, fileNodeID, targetTask, attributes)
 
     return isEdgesAdded
 
@@ -275,7 +310,7 @@ class configurationMethods:
           self.nodeMethods.optionNodeID += 1
           tool       = self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool')
           attributes = self.nodeMethods.buildNodeFromToolConfiguration(self.tools, tool, argument)
-          graph.add_node(tempNodeID, attributes = attributes)
+          self.nodeMethods.addGraphNode(graph, tempNodeID, attributes)
 
           # With the node addded, add the mergeNodeID to the dictionary containing nodes created in
           # this routine.  There will be at least two edges required for any of the nodes to be
@@ -297,7 +332,7 @@ class configurationMethods:
       for nodeID, task, argument in edgesToCreate[mergeNodeID]:
         tool = self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool')
 
-        if argument == 'read json file': self.edgeMethods.addJsonEdge(graph, mergeNodeID, task)
+        if argument == 'read json file': self.edgeMethods.addJsonEdge(graph, self.nodeMethods, mergeNodeID, task)
 
         # Add an edge from the merged node to this task.
         else: self.edgeMethods.addEdge(graph, self.nodeMethods, self.tools, mergeNodeID, task, argument)
@@ -323,7 +358,7 @@ class configurationMethods:
           # If the argument is 'read json file', create the edge.
           if argument == 'read json file':
             sourceNodeID = self.nodeMethods.getAssociatedFileNodeIDs(graph, mergeNodeID)[0]
-            self.edgeMethods.addJsonEdge(graph, sourceNodeID, task)
+            self.edgeMethods.addJsonEdge(graph, self.nodeMethods, sourceNodeID, task)
 
           # Deal with actual tool arguments.
           else:
@@ -421,7 +456,7 @@ class configurationMethods:
     fileNodeIDs.append(mergeFileNodeIDs[0] + '_1')
 
     # Update the attributes for the renamed file node.
-    self.nodeMethods.setGraphNodeAttribute(graph, mergeFileNodeIDs[0] + '_1', 'allowedExtensions', [outputExtensions[0]], True)
+    self.nodeMethods.setGraphNodeAttribute(graph, mergeFileNodeIDs[0] + '_1', 'allowedExtensions', [str(outputExtensions[0])], True)
 
     # Create the additional file nodes.
     for count in range(2, len(outputExtensions) + 1):
@@ -430,9 +465,9 @@ class configurationMethods:
       attributes                     = fileNodeAttributes()
       attributes.description         = self.nodeMethods.getGraphNodeAttribute(graph, mergeNodeID, 'description')
       attributes.allowMultipleValues = self.nodeMethods.getGraphNodeAttribute(graph, mergeNodeID, 'allowMultipleValues')
-      attributes.allowedExtensions   = [extension]
+      attributes.allowedExtensions   = [str(extension)]
       fileNodeIDs.append(fileNodeID)
-      graph.add_node(fileNodeID, attributes = attributes)
+      self.nodeMethods.addGraphNode(graph, fileNodeID, attributes)
 
     # Create edges from all of the file nodes to the task associated with the node being removed.
     for fileNodeID in fileNodeIDs:
@@ -521,11 +556,11 @@ class configurationMethods:
 
                       # Update the edges.
                       if isInput:
-                        graph.add_edge(correctFileNodeID, task, attributes = graph[fileNodeID][task]['attributes'])
-                        graph.remove_edge(fileNodeID, task)
+                        self.nodeMethods.addGraphEdge(graph, correctFileNodeID, task, graph[fileNodeID][task]['attributes'])
+                        self.nodeMethods.removeGraphEdge(graph, fileNodeID, task)
                       else:
-                        graph.add_edge(task, correctFileNodeID, attributes = graph[task][fileNodeID]['attributes'])
-                        graph.remove_edge(task, fileNodeID)
+                        self.nodeMethods.addGraphEdge(graph, task, correctFileNodeID, graph[task][fileNodeID]['attributes'])
+                        self.nodeMethods.removeGraphEdge(graph, task, fileNodeID)
 
   # Mark all greedy edges in the graph.
   def markGreedyEdges(self, graph):
@@ -565,65 +600,368 @@ class configurationMethods:
 
     return isIsolated, isolatedNodes
 
-  # Generate the task workflow from the topologically sorted pipeline graph.
+  # Generate the task workflow from the pipeline graph. Where the graph allows a choice of tasks, the
+  # tasks are ordered by their task IDs.
   def generateWorkflow(self, graph):
+    return self.orderWorkflow(graph, sorted(self.nodeMethods.getNodes(graph, 'task')))
+
+  # Ensure that each task outputting to a stream is followed by the tasks that read the stream. The
+  # supplied workflow is only modified where this is not already the case.
+  def correctWorkflowForStreams(self, graph, workflow):
+    return self.orderWorkflow(graph, workflow)
+
+  # Order the tasks in the graph, such that each task follows all of the tasks that it depends on and
+  # each task outputting to a stream is immediately followed by the tasks reading the stream. Tasks
+  # joined by streams are treated as a single unit (a chain) and the chains are sorted using Kahn's
+  # algorithm. Where there is a choice, the chain containing the task earliest in the supplied order
+  # is chosen first, so an order that already satisfies the constraints is returned unchanged.
+  def orderWorkflow(self, graph, order):
+    tasks                    = self.nodeMethods.getNodes(graph, 'task')
+    rank                     = self.getTaskRanks(tasks, order)
+    streamConsumers          = self.getStreamConsumers(tasks, lambda task: self.getTaskStreamConsumers(graph, task))
+    chains, chainOf          = self.getTaskChains(tasks, streamConsumers, rank)
+    successors, dependencies = self.getChainDependencies(graph, tasks, chains, chainOf, streamConsumers)
+
+    # Sort the chains.
+    available = [(rank[chains[chain][0]], chain) for chain in chains if dependencies[chain] == 0]
+    heapq.heapify(available)
     workflow = []
-    for nodeID in nx.topological_sort(graph):
-      if self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'nodeType') == 'task': workflow.append(nodeID)
+    while available:
+      chain = heapq.heappop(available)[1]
+      workflow.extend(chains[chain])
+      for successor in successors[chain]:
+        dependencies[successor] -= 1
+        if dependencies[successor] == 0: heapq.heappush(available, (rank[chains[successor][0]], successor))
 
-    return workflow
+    # If any tasks could not be ordered, the dependencies contain a loop, or the streams cannot be
+    # satisfied.
+    if len(workflow) != len(tasks): self.terminateUnorderedTasks(tasks, workflow, streamConsumers)
 
-  # The topological sort does not always generate the corret order. In this routine, check for
-  # cases where a task is outputting to the stream. It is possible that after this task, the
-  # topological sort could choose from multiple tasks to perform next. This routine exists to
-  # ensure that the task following is the one that expects the stream as its input.
-  def correctWorkflowForStreams(self, graph, workflow):
-    incomplete = True
-    startCount = 0
-    while incomplete:
-      for counter in range(startCount, len(workflow)):
-        task = workflow[counter]
-        if counter == len(workflow) - 1: incomplete = False
-        else:
-          nextTask         = workflow[counter + 1]
-          isOutputToStream = self.nodeMethods.getGraphNodeAttribute(graph, task, 'outputStream')
-  
-          # If this task outputs to the stream, determine what the next task should be.
-          if isOutputToStream:
-            for outputNodeID in graph.successors(task):
-              successorTasks  = []
-              for successorTask in graph.successors(outputNodeID): successorTasks.append(successorTask)
-  
-            # If the next task is not in the list of tasks, modify the workflow to ensure that it is.
-            successorIndex = workflow.index(successorTasks[0])
-            if nextTask not in successorTasks:
-
-              # Store the tasks 
-              workflowMiddle = []
-              workflowMiddle = workflow[counter + 1: successorIndex]
-
-              # Find all the tasks after the successor task. Once tasks have been moved around, these
-              # tasks will all be added to the end.
-              workflowEnd = []
-              workflowEnd = workflow[successorIndex + 1:]
-  
-              # Reconstruct the workflow.
-              updatedWorkflow = []
-              for updateCount in range(0, counter + 1): updatedWorkflow.append(workflow[updateCount])
-              updatedWorkflow.append(successorTasks[0])
-              for updateTask in workflowMiddle: updatedWorkflow.append(updateTask)
-              for updateTask in workflowEnd: updatedWorkflow.append(updateTask)
- 
-              # Update the workflow.
-              workflow = updatedWorkflow
+    return workflow
 
-              # Reset the startCount. There is no need to loop over the entire workflow on the next
-              # pass.
-              startCount = counter
-              break
+  # Split the tasks into stages, such that all of the tasks in a stage can run concurrently once the
+  # tasks in the previous stages are complete. Each stage is a list of chains of tasks, where a chain
+  # is a set of tasks joined by streaming edges which must run together. The number of chains in a stage
+  # is the number of concurrent jobs required to run it. Chains within a stage are listed in workflow
+  # order. The streaming edges are set by identifyStreamingNodes.
+  def getWorkflowStages(self, graph):
+    tasks                    = self.nodeMethods.getNodes(graph, 'task')
+    rank                     = self.getTaskRanks(tasks, self.pipeline.workflow)
+    streamConsumers          = self.getStreamConsumers(tasks, lambda task: self.getStreamingEdgeConsumers(graph, task))
+    chains, chainOf          = self.getTaskChains(tasks, streamConsumers, rank)
+    successors, dependencies = self.getChainDependencies(graph, tasks, chains, chainOf, streamConsumers)
+
+    # Each stage contains the chains whose dependencies are all in earlier stages.
+    stages         = []
+    numberOfChains = 0
+    stage          = [chain for chain in chains if dependencies[chain] == 0]
+    while stage:
+      stage.sort(key = lambda chain: rank[chains[chain][0]])
+      stages.append([chains[chain] for chain in stage])
+      numberOfChains += len(stage)
+      nextStage       = []
+      for chain in stage:
+        for successor in successors[chain]:
+          dependencies[successor] -= 1
+          if dependencies[successor] == 0: nextStage.append(successor)
+      stage = nextStage
+
+    if numberOfChains != len(chains): self.terminateUnorderedTasks(tasks, [task for stage in stages for chain in stage for task in chain], streamConsumers)
+
+    return stages
+
+  # Build the fused tasks for the pipeline. Tasks joined by streaming edges, as set by identifyStreamingNodes,
+  # form chains that are run together as a single process group, with no intermediate files written to
+  # disk. Each chain is returned as a fused task, in workflow order. Tasks that are not joined to other
+  # tasks by streams form fused tasks containing a single task.
+  def getFusedTasks(self, graph):
+    tasks           = self.nodeMethods.getNodes(graph, 'task')
+    rank            = self.getTaskRanks(tasks, self.pipeline.workflow)
+    streamConsumers = self.getStreamConsumers(tasks, lambda task: self.getStreamingEdgeConsumers(graph, task))
+    chains, chainOf = self.getTaskChains(tasks, streamConsumers, rank)
+    fusion          = streamFusion(self.nodeMethods, self.edgeMethods, self.tools)
+
+    return [fusion.buildFusedTask(graph, chains[chain]) for chain in sorted(chains, key = lambda chain: rank[chain])]
+
+  # Determine the critical path through the pipeline. Each task is weighted by the expected wall-clock
+  # time of its tool from the runtime history, using runs with inputs of a similar size if input sizes
+  # (in bytes) are supplied for the tasks. Tasks whose tool has no recorded runs are given the default
+  # time. Tasks reading a stream are treated as starting after the task writing the stream. Return the
+  # length of the critical path, the tasks on the critical path in workflow order and the slack for each
+  # task, which is the time by which the task can be delayed without delaying the pipeline.
+  def getCriticalPath(self, graph, history, defaultTime = 1., inputSizes = None):
+    workflow      = self.orderWorkflow(graph, self.pipeline.workflow)
+    predecessors  = {}
+    successors    = dict((task, []) for task in workflow)
+    times         = {}
+    dataNodeTasks = {}
+    for task in workflow:
+      toolID             = self.tools.getGeneralAttribute(self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool'), 'id')
+      inputSize          = inputSizes.get(task) if inputSizes else None
+      times[task]        = history.getWallTime(toolID, inputSize, defaultTime)
+      predecessors[task] = self.getTaskPredecessors(graph, task, dataNodeTasks)
+      for predecessorTask in predecessors[task]: successors[predecessorTask].append(task)
+
+    # Determine the earliest time each task can finish, in workflow order.
+    earliestStart  = {}
+    earliestFinish = {}
+    for task in workflow:
+      earliestStart[task]  = max([earliestFinish[predecessorTask] for predecessorTask in predecessors[task]] + [0.])
+      earliestFinish[task] = earliestStart[task] + times[task]
+    length = max(earliestFinish.values()) if workflow else 0.
+
+    # Determine the latest time each task can start without delaying the pipeline, in reverse workflow
+    # order.
+    latestStart = {}
+    slack       = {}
+    for task in reversed(workflow):
+      latestFinish      = min([latestStart[successorTask] for successorTask in successors[task]] + [length])
+      latestStart[task] = latestFinish - times[task]
+      slack[task]       = latestStart[task] - earliestStart[task]
+
+    # Tasks with no slack are on the critical path. Allow for rounding in the times.
+    tolerance    = 1e-9 * max(length, 1.)
+    criticalPath = [task for task in workflow if slack[task] <= tolerance]
+
+    return length, criticalPath, slack
+
+  # Order the tasks in the graph to reduce the disk space used by intermediate files. Intermediate files
+  # marked for deletion are kept until the last task using them is complete, so the order of the tasks
+  # determines how many of them exist at the same time. As in orderWorkflow, tasks joined by streams are
+  # treated as a single chain. At each step, the available chain that results in the smallest increase
+  # in the size of the intermediate files on disk is chosen, with ties broken by the size of the files
+  # the chain creates, and then by the current workflow. The sizes of the files (in bytes) are supplied
+  # keyed by filename. Files with no supplied size are given the default size. The returned workflow
+  # should be set as the pipeline workflow, so that files are deleted accordingly by setWhenToDeleteFiles.
+  def orderWorkflowByDiskUsage(self, graph, fileSizes, defaultSize = 0):
+    tasks                    = self.nodeMethods.getNodes(graph, 'task')
+    rank                     = self.getTaskRanks(tasks, self.pipeline.workflow)
+    streamConsumers          = self.getStreamConsumers(tasks, lambda task: self.getTaskStreamConsumers(graph, task))
+    chains, chainOf          = self.getTaskChains(tasks, streamConsumers, rank)
+    successors, dependencies = self.getChainDependencies(graph, tasks, chains, chainOf, streamConsumers)
+
+    # Find the intermediate files created and used by each chain, and the chains that have yet to use
+    # each file.
+    sizes, producers, consumers = self.getIntermediateFileSizes(graph, fileSizes, defaultSize)
+    chainFiles                  = dict((chain, set()) for chain in chains)
+    remainingChains             = {}
+    for fileNodeID in sizes:
+      remainingChains[fileNodeID] = set(chainOf[task] for task in consumers[fileNodeID] | set([producers[fileNodeID]]))
+      for chain in remainingChains[fileNodeID]: chainFiles[chain].add(fileNodeID)
+
+    # Find the size of the files each chain creates, and the size of the files that would be deleted if
+    # the chain was run next (the files for which it is the only remaining chain). The sizes deleted are
+    # updated as chains are run.
+    created = dict((chain, 0) for chain in chains)
+    deleted = dict((chain, 0) for chain in chains)
+    for fileNodeID in sizes:
+      created[chainOf[producers[fileNodeID]]] += sizes[fileNodeID]
+      if len(remainingChains[fileNodeID]) == 1: deleted[list(remainingChains[fileNodeID])[0]] += sizes[fileNodeID]
+
+    # Get the change in the size of the intermediate files on disk if a chain is run next, the size of the
+    # files it creates and its rank.
+    def getSizeChange(chain):
+      return created[chain] - deleted[chain], created[chain], rank[chains[chain][0]]
+
+    # The available chains are held in a heap. When the size change of an available chain changes, a new
+    # entry is added, and entries that are out of date are ignored.
+    available = [(getSizeChange(chain), chain) for chain in chains if dependencies[chain] == 0]
+    heapq.heapify(available)
+    isRun     = set()
+    workflow  = []
+    while available:
+      sizeChange, chain = heapq.heappop(available)
+      if chain in isRun or sizeChange != getSizeChange(chain): continue
+      isRun.add(chain)
+      workflow.extend(chains[chain])
+      for fileNodeID in chainFiles[chain]:
+        remainingChains[fileNodeID].discard(chain)
+        if len(remainingChains[fileNodeID]) == 1:
+          remainingChain           = list(remainingChains[fileNodeID])[0]
+          deleted[remainingChain] += sizes[fileNodeID]
+          if dependencies[remainingChain] == 0 and remainingChain not in isRun: heapq.heappush(available, (getSizeChange(remainingChain), remainingChain))
+      for successor in successors[chain]:
+        dependencies[successor] -= 1
+        if dependencies[successor] == 0: heapq.heappush(available, (getSizeChange(successor), successor))
+
+    if len(workflow) != len(tasks): self.terminateUnorderedTasks(tasks, workflow, streamConsumers)
 
     return workflow
 
+  # Determine the largest total size of the intermediate files that exist at the same time when the
+  # tasks are run in the order of the supplied workflow. Files are created by their producing task and
+  # deleted once the last task using them is complete.
+  def getPeakIntermediateFileSize(self, graph, workflow, fileSizes, defaultSize = 0):
+    sizes, producers, consumers = self.getIntermediateFileSizes(graph, fileSizes, defaultSize)
+    position                    = dict((task, index) for index, task in enumerate(workflow))
+    created                     = dict((task, 0) for task in workflow)
+    deleted                     = dict((task, 0) for task in workflow)
+    for fileNodeID in sizes:
+      lastTask = max(consumers[fileNodeID] | set([producers[fileNodeID]]), key = lambda task: position.get(task, -1))
+      if producers[fileNodeID] in created: created[producers[fileNodeID]] += sizes[fileNodeID]
+      if lastTask in deleted: deleted[lastTask] += sizes[fileNodeID]
+
+    size = peakSize = 0
+    for task in workflow:
+      size    += created[task]
+      peakSize = max(peakSize, size)
+      size    -= deleted[task]
+
+    return peakSize
+
+  # Get the total size of each intermediate file node whose files are deleted, along with the task
+  # producing the files and the tasks using them. As in setWhenToDeleteFiles, the files are used by all
+  # tasks connected to the option node.
+  def getIntermediateFileSizes(self, graph, fileSizes, defaultSize):
+    sizes     = {}
+    producers = {}
+    consumers = {}
+    for record in self.getFileLifecycle(graph).records.values():
+      if record.getStatus() == 'delete':
+        sizes[record.fileNodeID]     = sum(fileSizes.get(value, defaultSize) for values in record.values.values() for value in values)
+        producers[record.fileNodeID] = record.producer
+        consumers[record.fileNodeID] = set(record.consumers)
+        for task in graph.succ.get(record.optionNodeID, ()):
+          if self.nodeMethods.getGraphNodeAttribute(graph, task, 'nodeType') == 'task': consumers[record.fileNodeID].add(task)
+
+    return sizes, producers, consumers
+
+  # Rank the tasks by their position in the supplied order. Tasks not in the order follow, ordered by
+  # their task IDs.
+  def getTaskRanks(self, tasks, order):
+    rank = {}
+    for task in order:
+      if task not in rank: rank[task] = len(rank)
+    for task in sorted(tasks):
+      if task not in rank: rank[task] = len(rank)
+
+    return rank
+
+  # Find the tasks reading the output stream of each task, using the supplied method to identify the
+  # consumers of a task's stream. A stream can be read by multiple tasks, but a task can only read a
+  # single stream.
+  def getStreamConsumers(self, tasks, getConsumers):
+    streamConsumers = {}
+    streamProducer  = {}
+    for task in tasks:
+      consumers = getConsumers(task)
+      if consumers:
+        for consumer in consumers:
+          if consumer in streamProducer: self.errors.multipleStreamProducers(consumer, [streamProducer[consumer], task])
+          streamProducer[consumer] = task
+        streamConsumers[task] = consumers
+
+    return streamConsumers
+
+  # Build the chains of tasks joined by streams. Each chain is identified by the first task in the
+  # chain. If a stream is read by multiple tasks, the chain branches. The tasks in a chain are listed
+  # such that each task reading a stream follows the task writing it, with the tasks reading each stream
+  # ordered by rank and each followed by the tasks reading its own stream. If the streams form a loop,
+  # no chain will contain the tasks in the loop, so these are left as chains, and will fail to be ordered.
+  def getTaskChains(self, tasks, streamConsumers, rank):
+    streamProducers = set(consumer for consumers in streamConsumers.values() for consumer in consumers)
+    chains          = {}
+    chainOf         = {}
+    for task in tasks:
+      if task not in streamProducers:
+        chains[task] = []
+        stack        = [task]
+        while stack:
+          chainTask = stack.pop()
+          chains[task].append(chainTask)
+          chainOf[chainTask] = task
+          stack.extend(sorted(streamConsumers.get(chainTask, ()), key = lambda consumer: rank[consumer], reverse = True))
+    for task in tasks:
+      if task not in chainOf:
+        chains[task]  = [task]
+        chainOf[task] = task
+
+    return chains, chainOf
+
+  # Determine the dependencies between chains. The tasks in a chain run at the same time, so a task can
+  # only depend on another task in the same chain if it reads the stream written by that task, directly
+  # or through other tasks in the chain. Other dependencies within a chain cannot be satisfied, so a loop
+  # is created to ensure that the chain is reported as impossible to order. Return the successors of each
+  # chain and the number of chains each chain depends on.
+  def getChainDependencies(self, graph, tasks, chains, chainOf, streamConsumers):
+    streamProducer = {}
+    for task in streamConsumers:
+      for consumer in streamConsumers[task]: streamProducer[consumer] = task
+
+    successors    = dict((chain, set()) for chain in chains)
+    dependencies  = dict((chain, 0) for chain in chains)
+    dataNodeTasks = {}
+    for task in tasks:
+      chain = chainOf[task]
+      for predecessorTask in self.getTaskPredecessors(graph, task, dataNodeTasks):
+        predecessorChain = chainOf[predecessorTask]
+        if predecessorChain == chain and self.isStreamAncestor(predecessorTask, task, streamProducer): continue
+        if chain not in successors[predecessorChain]:
+          successors[predecessorChain].add(chain)
+          dependencies[chain] += 1
+
+    return successors, dependencies
+
+  # Determine if a task writes a stream that is read, directly or through other tasks, by another task.
+  def isStreamAncestor(self, ancestor, task, streamProducer):
+    visited = set()
+    while task in streamProducer and task not in visited:
+      visited.add(task)
+      task = streamProducer[task]
+      if task == ancestor: return True
+
+    return False
+
+  # Terminate if some of the tasks could not be ordered.
+  def terminateUnorderedTasks(self, tasks, orderedTasks, streamConsumers):
+    unorderedTasks = sorted(set(tasks) - set(orderedTasks))
+    self.errors.impossibleWorkflowOrder(unorderedTasks, [task for task in unorderedTasks if task in streamConsumers])
+
+  # Get the tasks that read the output stream from a task, ordered by task ID. If the task does not output
+  # to a stream, return an empty list. The stream is identified as the output file node whose argument
+  # can output to a stream. If none of the arguments are identified as such, all output file nodes are
+  # considered.
+  def getTaskStreamConsumers(self, graph, task):
+    if not self.nodeMethods.getGraphNodeAttribute(graph, task, 'outputStream'): return []
+
+    tool        = self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool')
+    fileNodeIDs = self.nodeMethods.getSuccessorFileNodes(graph, task)
+    streamNodes = []
+    for fileNodeID in fileNodeIDs:
+      argument = self.edgeMethods.getEdgeAttribute(graph, task, fileNodeID, 'longFormArgument')
+      if argument and self.tools.getArgumentAttribute(tool, argument, 'outputStream') != None: streamNodes.append(fileNodeID)
+    if not streamNodes: streamNodes = fileNodeIDs
+
+    consumers = set()
+    for fileNodeID in streamNodes: consumers.update(self.nodeMethods.getSuccessorTaskNodes(graph, fileNodeID))
+
+    return sorted(consumers)
+
+  # Get the tasks that read the output stream from a task, as identified by the streaming edges set by
+  # identifyStreamingNodes, ordered by task ID. If the task does not output to a stream, return an empty
+  # list.
+  def getStreamingEdgeConsumers(self, graph, task):
+    consumers = set()
+    for fileNodeID in self.nodeMethods.getSuccessorFileNodes(graph, task):
+      if self.edgeMethods.getEdgeAttribute(graph, task, fileNodeID, 'isStreaming'):
+        for successorTask in self.nodeMethods.getSuccessorTaskNodes(graph, fileNodeID):
+          if self.edgeMethods.getEdgeAttribute(graph, fileNodeID, successorTask, 'isStreaming'): consumers.add(successorTask)
+
+    return sorted(consumers)
+
+  # Get the tasks that a task depends on, either directly or through option and file nodes. The tasks
+  # feeding each option and file node are stored in dataNodeTasks, so each is only found once.
+  def getTaskPredecessors(self, graph, task, dataNodeTasks):
+    predecessorTasks = set()
+    for nodeID in graph.pred[task]:
+      if nodeID in dataNodeTasks: predecessorTasks.update(dataNodeTasks[nodeID])
+      elif self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'nodeType') == 'task': predecessorTasks.add(nodeID)
+      else:
+        dataNodeTasks[nodeID] = self.getTaskPredecessors(graph, nodeID, dataNodeTasks)
+        predecessorTasks.update(dataNodeTasks[nodeID])
+
+    return predecessorTasks
+
   # Process any 'additional nodes' for this pipeline.
   def processAdditionalNodes(self, graph):
     if self.pipeline.hasAdditionalNodes:
@@ -641,7 +979,7 @@ class configurationMethods:
         isInput    = self.tools.getArgumentAttribute(tool, argument, 'isInput')
         isOutput   = self.tools.getArgumentAttribute(tool, argument, 'isOutput')
         isFile = True if (isInput or isOutput) else False
-        graph.add_node(nodeID, attributes = attributes)
+        self.nodeMethods.addGraphNode(graph, nodeID, attributes)
 
         # If this argument points to a file, also create a file node.
         if isFile:
@@ -657,7 +995,7 @@ class configurationMethods:
             attributes.description         = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'description')
             attributes.allowMultipleValues = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'allowMultipleValues')
             attributes.allowedExtensions   = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'allowedExtensions')
-            graph.add_node(fileNodeID, attributes = attributes)
+            self.nodeMethods.addGraphNode(graph, fileNodeID, attributes)
 
         # Loop over all the task/argument pairs and add edges to the new node.
         for task in self.pipeline.additionalNodes[configNodeID]:
@@ -730,14 +1068,14 @@ class configurationMethods:
     if self.isPipeline: tool = self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool')
     else: tool = task
 
-    for node in self.parameterSets.parameterSetAttributes[tool][parameterSet].nodes:
-      nodeIDToSet = None
+    # Index the option nodes for this task by argument, so that the node for each argument set in the
+    # parameter set can be found.
+    optionNodes = {}
+    for nodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
+      optionNodes[self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'longFormArgument')] = nodeID
 
-      # Check all of the nodes set for this tool, determine the associated arguments and find the node ID
-      # of the node for the argument set in the parameter set.
-      for nodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
-        argument = self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'longFormArgument')
-        if argument == node.argument: nodeIDToSet = nodeID
+    for node in self.parameterSets.parameterSetAttributes[tool][parameterSet].nodes:
+      nodeIDToSet = optionNodes.get(node.argument)
 
       # If the node doesn't exist, check that the argument requested in the parameter set is valid for this tool.
       if not nodeIDToSet:
@@ -753,10 +1091,11 @@ class configurationMethods:
         # Create a new node for the argument.
         nodeIDToSet = 'OPTION_' + str(self.nodeMethods.optionNodeID)
         self.nodeMethods.optionNodeID += 1
-        graph.add_node(nodeIDToSet, attributes = attributes)
+        self.nodeMethods.addGraphNode(graph, nodeIDToSet, attributes)
 
         # Add an edge from the new node to the tool node.
         self.edgeMethods.addEdge(graph, self.nodeMethods, self.tools, nodeIDToSet, task, longFormArgument)
+        optionNodes[longFormArgument] = nodeIDToSet
 
         # If the option node corresponds to a file, build a file node.
         if self.nodeMethods.getGraphNodeAttribute(graph, nodeIDToSet, 'isFile'):
@@ -855,135 +1194,122 @@ class configurationMethods:
         if not hasPredecessor:
           values = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
           if values:
-            if key == 'all':
-              for iteration in values.keys():
-                for value in values[iteration]: dependencies.append((fileNodeID, value))
-  
-            # Just get values for a particular key.
-            elif key in values:
-              for value in values[key]: dependencies.append((fileNodeID, value))
-  
-            # TODO CHECK
-            elif key not in values and key != 1:
-               for value in values[1]: dependencies.append((fileNodeID, value))
-  
+            iterations = self.iterations.getIterationKeys(values, key)
+
             # If the key is unknown, fail.
             #TODO Errors.
-            else:
+            if iterations == None:
               print('UNKNOWN KEY: configurationClass.getGraphDependencies', key)
               print(values)
               self.errors.terminate()
 
+            for iteration in iterations:
+              for value in values[iteration]: dependencies.append((fileNodeID, value))
+
     return dependencies
 
+  # Check the input files and outputs before the pipeline is run (see preflightChecker). The dependencies
+  # and outputs are those returned by getGraphDependencies and getGraphOutputs. The statuses of the files
+  # are cached for the rest of the build (see getFileStatus). If any problems are found, terminate with
+  # all of the problems listed. Otherwise, return the report (holding the sizes of the input files).
+  def preflightFiles(self, graph, dependencies, outputs, terminateIfPresent = None, numberOfThreads = None, rejectEmptyFiles = False):
+    checker = preflightChecker(self.nodeMethods, self.fileStatuses, numberOfThreads, rejectEmptyFiles)
+    report  = checker.checkFiles(graph, dependencies, outputs, terminateIfPresent)
+    if report.hasProblems(): self.errors.preflightFailed(report)
+
+    return report
+
+  # Get the status of a file, using the status found during the pre-flight checks if available.
+  def getFileStatus(self, filename):
+    return self.fileStatuses.getStatus(filename)
+
   # Determine all of the outputs.  This is essentially all file nodes with no predecessors.
   def getGraphOutputs(self, graph, taskList, deleteList, key):
 
     # Collect all the files that are deleted in this phase.
-    filesDeleted = []
+    filesDeleted = set()
     for task in deleteList:
-      for iteration in deleteList[task]:
-        for filename in deleteList[task][iteration]: filesDeleted.append(filename)
+      for iteration in deleteList[task]: filesDeleted.update(deleteList[task][iteration])
 
-    outputs     = []
+    outputs   = []
+    lifecycle = self.getFileLifecycle(graph)
     for task in taskList:
-      for fileNodeID in self.nodeMethods.getSuccessorFileNodes(graph, task):
-        optionNodeID = self.nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
-        deleteFiles  = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'deleteFiles')
-        isStreaming  = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'isStreaming')
-        isTemporary  = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'isTemporary')
-        values       = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
-
-        # Get the tasks associated with this option node.
-        tasks = graph.successors(optionNodeID)
+      for record in lifecycle.getOutputRecords(task):
 
         # By default, all files produced by the pipeline are kept and so should be listed as
         # outputs. However, some files are listed as to be deleted, so do not include these as
         # outputs.
-        #if not deleteFiles and not isStreaming and not isTemporary:
-        if not isStreaming and not isTemporary:
-          if key == 'all':
-            for iteration in values.keys():
-              for value in values[iteration]:
-                if value not in filesDeleted: outputs.append((optionNodeID, value))
-  
-          # Just get values for a particular key.
-          elif key in values:
-            for value in values[key]:
-              if value not in filesDeleted: outputs.append((optionNodeID, value))
-  
-          #TODO CHECK
-          elif key not in values and key != 1:
-            for value in values[1]:
-              if value not in filesDeleted: outputs.append((optionNodeID, value))
+        if not record.isStreaming and not record.isTemporary:
+          iterations = self.iterations.getIterationKeys(record.values, key)
 
           # If the key is unknown, fail.
           #TODO Errors.
-          else:
+          if iterations == None:
             print('UNKNOWN KEY: configurationClass.getGraphOutputs', key)
             self.errors.terminate()
 
+          for iteration in iterations:
+            for value in record.values[iteration]:
+              if value not in filesDeleted: outputs.append((record.optionNodeID, value))
+
     return outputs
 
   # Determine all of the intermediate files in the graph.  This is all of the file nodes that have both
   # predecessor and successor nodes.
   def getGraphIntermediateFiles(self, graph, taskList):
     intermediates = {}
-    seenNodes     = {}
+    seenNodes     = set()
+    lifecycle     = self.getFileLifecycle(graph)
     for task in taskList:
-      for fileNodeID in self.nodeMethods.getPredecessorFileNodes(graph, task):
+      for record in lifecycle.getInputRecords(task):
+
+        # Store this node in the list of nodes that have been checked. This ensures that the same nodes
+        # values aren't added to the list multiple times. For example, if a file is produced by one task
+        # and is then used by multiple subsequent tasks, the same node will come up for each of the tasks
+        # that use the file, but it should only be listed as an intermediate file once. Directories and
+        # files streamed to the task are not included.
+        if record.isDirectory or record.fileNodeID in seenNodes: continue
+        seenNodes.add(record.fileNodeID)
+        if record.isIntermediate() and record.deleteFiles and task not in record.streamingConsumers:
+          for iteration in record.values.keys():
+            if iteration not in intermediates: intermediates[iteration] = []
+            for value in record.values[iteration]: intermediates[iteration].append((record.optionNodeID, value))
 
-        # If the node refers to a directory, do not include it.
-        optionNodeID = self.nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
-        if not self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'isDirectory'):
-          deleteFiles  = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'deleteFiles')
-  
-          # Determine if the node has any predecessors or successors.
-          hasPredecessor = self.nodeMethods.hasPredecessor(graph, fileNodeID)
-          hasSuccessor   = self.nodeMethods.hasSuccessor(graph, fileNodeID)
-  
-          # Store this node in the list of nodes that have been checked. This ensures that the same nodes
-          # values aren't added to the list multiple times. For example, if a file is produced by one task
-          # and is then used by multiple subsequent tasks, the same node will come up for each of the tasks
-          # that use the file, but it should only be listed as an intermediate file once.
-          if fileNodeID not in seenNodes:
-            seenNodes[fileNodeID] = True
-            if hasPredecessor and hasSuccessor and deleteFiles:
-              values = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
-  
-              # Do not include streaming nodes.
-              if not self.edgeMethods.getEdgeAttribute(graph, fileNodeID, task, 'isStreaming'):
-                for iteration in values.keys():
-                  if iteration not in intermediates: intermediates[iteration] = []
-                  for value in values[iteration]: intermediates[iteration].append((optionNodeID, value))
-      
     return intermediates
 
   # Deterrmine when each intermediate file is last used,
   def setWhenToDeleteFiles(self, graph, intermediates):
     deleteList = {}
+    lifecycle  = self.getFileLifecycle(graph)
     for counter in intermediates:
       for nodeID, filename in intermediates[counter]:
-  
-        # Find the successor task nodes.
-        successorNodeIDs = graph.successors(nodeID)
-  
-        # Determine which of these tasks comes last in the workflow.
-        for task in reversed(self.pipeline.workflow):
-          if task in successorNodeIDs: break
-  
+
+        # Find the last task in the workflow using the file.
+        task, position = lifecycle.getLastConsumer(graph, nodeID)
+
         # Store the task when the file can be deleted.
         if filename in deleteList:
           # TODO ERROR
           print('SAME FILENAME', filename, 'appears multiple times in the list of intermediate files - setWhenToDeleteFiles')
           self.errors.terminate()
-  
+
         if task not in deleteList: deleteList[task] = {}
         if counter not in deleteList[task]: deleteList[task][counter] = []
         deleteList[task][counter].append(filename)
 
     return deleteList
 
+  # Get the file lifecycle index for the graph. The index is built once the workflow is fixed and is
+  # rebuilt if the workflow or the graph (its nodes, edges or their attributes) has changed.
+  def getFileLifecycle(self, graph):
+    indexes = self.nodeMethods.getNodeIndexes(graph)
+    key     = (graph, tuple(self.pipeline.workflow), indexes, indexes.graphVersion)
+    if self.fileLifecycle == None or self.fileLifecycleKey != key:
+      self.fileLifecycle    = fileLifecycleIndex(graph, self.nodeMethods, self.edgeMethods, self.pipeline.workflow)
+      self.fileLifecycleKey = key
+
+    return self.fileLifecycle
+
   # Get all of the outputs from a task.
   def getTaskOutputs(self, graph, task, iteration):
     outputIDs = []
@@ -998,21 +1324,13 @@ class configurationMethods:
       if not isStreaming and not isTemporary:
       #if not isStreaming and not isDirectory:
         values = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
-        if iteration == 'all':
-          for counter in values:
-            for value in values[counter]: outputIDs.append(value)
-  
-        elif iteration in values:
-          for value in values[iteration]: outputIDs.append(value)
-  
-        elif iteration != 1:
-          for value in values[1]: outputIDs.append(value)
-  
-        else:
+        if self.iterations.getIterationKeys(values, iteration) == None:
           #TODO ERROR
           print('Unknown iteration in getTaskOutputs.')
           self.errors.terminate()
 
+        outputIDs.extend(self.iterations.getIterationValues(values, iteration))
+
     return outputIDs
 
   # Get all of the dependencies for a task.
@@ -1034,56 +1352,67 @@ class configurationMethods:
           if isGreedy: iteration = 'all'
   
           # Get the dependencies.
-          if iteration == 'all':
-            for counter in values:
-              for value in values[counter]: dependencies.append(value)
-    
-          elif iteration in values:
-            for value in values[iteration]: dependencies.append(value)
-    
-          elif iteration != 1:
-            for value in values[1]: dependencies.append(value)
-    
-          else:
+          if self.iterations.getIterationKeys(values, iteration) == None:
             #TODO ERROR
             print('Unknown iteration in getTaskDependencies.')
             self.errors.terminate()
 
+          dependencies.extend(self.iterations.getIterationValues(values, iteration))
+
     return dependencies
 
-  # For each task, determine the maximum number of datasets associated with any option.
-  def getNumberOfDataSets(self, graph):
-    for task in self.pipeline.workflow:
-      totalNumber                  = 0
-      isGreedy                     = False
-      hasMultipleInputFiles        = False
-      hasMultipleNonFileParameters = False
+  # Get the graph of (task, iteration) pairs, allowing each iteration of a task to be run as soon as the
+  # iterations of the tasks it depends on are complete. The number of data sets for each task must have
+  # been determined by getNumberOfDataSets.
+  def getIterationGraph(self, graph):
+    return iterationGraph(graph, self.nodeMethods, self.edgeMethods, self.pipeline.workflow)
+
+  # Get the identity of the tool used by a task. This is the tool ID along with the components of the
+  # executable.
+  def getToolIdentity(self, graph, task):
+    getAttribute = lambda attribute: self.nodeMethods.getGraphNodeAttribute(graph, task, attribute)
+    toolID       = self.tools.getGeneralAttribute(getAttribute('tool'), 'id')
+    return [toolID, getAttribute('precommand'), getAttribute('path'), getAttribute('executable'), getAttribute('modifier')]
+
+  # Get the resolved argument values for each iteration of a task, keyed by iteration. Each is a sorted
+  # list of [argument, values].
+  def getTaskArgumentValues(self, graph, task):
+    arguments = {}
+    for iteration, selection in self.iterations.getTaskIterations(graph, task):
+      arguments[iteration] = []
       for nodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
-        numberOfDataSets = len(self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'values'))
-        isInput          = self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'isInput')
-        isFile           = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'isFile')
-
-        # Record if this task has multiple input files.
-        if isInput and numberOfDataSets > 1: hasMultipleInputFiles = True
-
-        # Record if this task has multiple iterations of a non filename parameter.
-        if not isFile and numberOfDataSets > 1: hasMultipleNonFileParameters = True
+        argument = self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'longFormArgument')
+        values   = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'values')
+        if argument: arguments[iteration].append([argument, [str(value) for value in self.iterations.getIterationValues(values, selection.get(nodeID, iteration))]])
+      arguments[iteration].sort()
 
-        # Update the number of data sets.
-        if numberOfDataSets > totalNumber: totalNumber = numberOfDataSets
+    return arguments
 
-        # Check if this option is greedy. If the task has a greedy argument, then the number
-        # of data sets is one. This is only true if the input argument with multiple values is a 
-        # file. For example, if there is a single input file and multiple parameters, there will
-        # be multiple output files, even though the task is greedy.
-        if self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'isGreedy'): isGreedy = True
+  # Get the signature of each iteration of each task in the workflow, keyed by (task, iteration). The
+  # signature is a dictionary holding the tool identity, the resolved argument values and the input and
+  # output files (as given by getTaskDependencies and getTaskOutputs). The iteration graph can be supplied
+  # if it has already been built.
+  def getTaskSignatures(self, graph, iterations = None):
+    if not iterations: iterations = self.getIterationGraph(graph)
+    signatures = {}
+    for task in self.pipeline.workflow:
+      tool      = self.getToolIdentity(graph, task)
+      isGreedy  = self.nodeMethods.getGraphNodeAttribute(graph, task, 'isGreedy')
+      arguments = self.getTaskArgumentValues(graph, task)
+      for iteration in range(1, iterations.numberOfIterations[task] + 1):
+        signature              = {}
+        signature['tool']      = tool
+        signature['arguments'] = arguments.get(iteration, arguments.get(1, []))
+        signature['inputs']    = sorted(set(self.getTaskDependencies(graph, task, isGreedy, iteration)))
+        signature['outputs']   = sorted(set(self.getTaskOutputs(graph, task, iteration)))
+        signatures[(task, iteration)] = signature
+
+    return signatures
 
-      #TODO Check the inclusion of hasMultipleNonFileParameters does not break things.
-      # If the task is greedy, check which argument has multiple values. If it is a file, then
-      # the number of data sets is one. If there are multiple
-      if isGreedy and hasMultipleInputFiles and not hasMultipleNonFileParameters:
-        self.nodeMethods.setGraphNodeAttribute(graph, task, 'numberOfDataSets', 1)
-      else: self.nodeMethods.setGraphNodeAttribute(graph, task, 'numberOfDataSets', totalNumber)
+  # For each task, determine the maximum number of datasets associated with any option.
+  def getNumberOfDataSets(self, graph):
+    for task in self.pipeline.workflow:
+      self.nodeMethods.setGraphNodeAttribute(graph, task, 'numberOfDataSets', self.iterations.getNumberOfIterations(graph, task))
 
   # Set commands to evaluate at run time.
   def evaluateCommands(self, graph):
@@ -1158,8 +1487,8 @@ class configurationMethods:
           # Create an edge between the nodes used for evaluating the command and this task.
           for optionNodeID in linkedNodeIDs:
             fileNodeIDs = self.nodeMethods.getAssociatedFileNodeIDs(graph, optionNodeID)
-            self.edgeMethods.addEvaluateCommandEdge(graph, optionNodeID, task)
-            self.edgeMethods.addEvaluateCommandEdge(graph, fileNodeIDs[0], task)
+            self.edgeMethods.addEvaluateCommandEdge(graph, self.nodeMethods, optionNodeID, task)
+            self.edgeMethods.addEvaluateCommandEdge(graph, self.nodeMethods, fileNodeIDs[0], task)
 
           # Record that the pipeline contains an argument that evaluated a command.
           self.hasCommandToEvaluate = True
@@ -1204,6 +1533,62 @@ class configurationMethods:
             #TODO CHECK IF I NEED TO MODIFY COMMAND LINE ARGUMENTS HERE.
             break
 
+  # Generate a hash of the pipeline and tool configuration files used to build the graph. If any of
+  # the files cannot be read, return None.
+  def getConfigurationHash(self, filenames):
+    configurationHash = hashlib.sha1(str(graphSnapshotVersion).encode('utf-8'))
+    for filename in sorted(filenames):
+      try:
+        with open(filename, 'rb') as filehandle: contents = filehandle.read()
+      except IOError: return None
+      configurationHash.update(filename.encode('utf-8'))
+      configurationHash.update(contents)
+
+    return configurationHash.hexdigest()
+
+  # Write the built graph to a snapshot file, along with the information about the graph held in this
+  # class and the pipeline. Once the graph has been built and the workflow and streaming nodes have
+  # been determined, the graph only depends on the configuration files, so reloading the snapshot
+  # avoids rebuilding the graph. The node indexes are not stored, since they are rebuilt when needed.
+  def writeGraphSnapshot(self, graph, filename, configurationHash):
+    pipelineArgumentIDs = {}
+    for argument in self.pipeline.pipelineArguments: pipelineArgumentIDs[argument] = self.pipeline.pipelineArguments[argument].ID
+
+    data                        = {}
+    data['version']             = graphSnapshotVersion
+    data['configurationHash']   = configurationHash
+    data['nodeIDs']             = self.nodeIDs
+    data['optionNodeID']        = self.nodeMethods.optionNodeID
+    data['pipelineArgumentIDs'] = pipelineArgumentIDs
+    data['workflow']            = self.pipeline.workflow
+
+    indexes = graph.graph.pop('nodeIndexes', None)
+    try:
+      data['graph'] = graph
+      success       = self.fileOperations.writePickleFile(filename, data)
+    finally:
+      if indexes: graph.graph['nodeIndexes'] = indexes
+
+    return success
+
+  # Read a graph snapshot. If the snapshot cannot be read or was built from different configuration
+  # files, return None. Otherwise, restore the information held in this class and the pipeline and
+  # return the graph.
+  def readGraphSnapshot(self, filename, configurationHash):
+    data = self.fileOperations.readPickleFile(filename)
+    if not isinstance(data, dict) or data.get('version') != graphSnapshotVersion: return None
+    if configurationHash == None or data.get('configurationHash') != configurationHash: return None
+
+    # Check that the snapshot refers to the same pipeline arguments.
+    if set(data['pipelineArgumentIDs']) != set(self.pipeline.pipelineArguments): return None
+    for argument in data['pipelineArgumentIDs']: self.pipeline.pipelineArguments[argument].ID = data['pipelineArgumentIDs'][argument]
+
+    self.nodeIDs                  = data['nodeIDs']
+    self.nodeMethods.optionNodeID = data['optionNodeID']
+    self.pipeline.workflow        = data['workflow']
+
+    return data['graph']
+
   # Search for unset flag nodes and set the values to 'unset'.
   def searchForUnsetFlags(self, graph):
     for nodeID in self.nodeMethods.getNodes(graph, 'option'):
@@ -1225,7 +1610,7 @@ class configurationMethods:
 
     # If no parameter set name was provided, or the parameter set already exists, fail.
     if parameterSetName == '': self.errors.noParameterSetNameInExport(filename, parameterSetName, isVerbose)
-    if parameterSetName in self.parameterSets.parameterSetAttributes[runName]: self.errors.parameterSetNameExists(parameterSetName, isVerbose)
+    if parameterSetName in self.parameterSets.getAvailableParameterSets(runName): self.errors.parameterSetNameExists(parameterSetName, isVerbose)
 
     # Get all of the arguments set by the user.
     if isPipeline: arguments = self.getAllPipelineArguments(graph)
@@ -1257,27 +1642,33 @@ class configurationMethods:
 
     return arguments
 
-  # Check that all pipeline arguments listed as required were set.
+  # Get the values of the arguments for a run, resolved from the gkno defaults, the default parameter
+  # set, the requested parameter set and the command line (see layeredArguments). If includeGknoDefaults
+  # is not set, the gkno defaults layer is left empty.
+  def getLayeredArguments(self, graph, commandLine, runName, parameterSetName, includeGknoDefaults = True):
+    gknoDefaults = []
+    if includeGknoDefaults and 'gkno' in graph:
+      for nodeID in graph.predecessors('gkno'):
+        values = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'values')
+        if values: gknoDefaults.append((self.edgeMethods.getEdgeAttribute(graph, nodeID, 'gkno', 'longFormArgument'), values[min(values)]))
+    commandLineArguments = commandLine.argumentDictionary.items() if commandLine else []
+
+    return self.parameterSets.getLayeredArguments(runName, parameterSetName, self.isPipeline, gknoDefaults, commandLineArguments)
+
+  # Check that all pipeline arguments listed as required were set. Required arguments can only be set on
+  # the command line or in the default or requested parameter sets, so the gkno defaults are not included
+  # (a gkno argument could share its long form with a pipeline argument).
   def checkArguments(self, graph, commandLine, runName, parameterSetName, hasMultipleRuns, loopData):
+    arguments = self.getLayeredArguments(graph, commandLine, runName, parameterSetName, includeGknoDefaults = False)
     for longFormArgument in self.pipeline.pipelineArguments:
       isSet             = False
       shortFormArgument = self.pipeline.pipelineArguments[longFormArgument].shortFormArgument
       description       = self.pipeline.pipelineArguments[longFormArgument].description
       if self.pipeline.pipelineArguments[longFormArgument].isRequired:
 
-        # Check if this required pipeline argument was set on the command line.
-        if longFormArgument in commandLine.argumentDictionary: isSet = True
-
-        # If the argument wasn't set on the command line, check to see if it was set using a parameter set.
-        # First check the default parameter set.
-        if not isSet:
-          for node in self.parameterSets.parameterSetAttributes[runName]['default'].nodes:
-            if longFormArgument == node.argument: isSet = True
-
-        # Then, if necessary, check the requested parameter set.
-        if not isSet and parameterSetName != 'default':
-          for node in self.parameterSets.parameterSetAttributes[runName][parameterSetName].nodes:
-            if longFormArgument == node.argument: isSet = True
+        # Check if this required pipeline argument was set on the command line or using the default or
+        # requested parameter sets.
+        if arguments.isSet(longFormArgument): isSet = True
 
         # If necessary, check if multiple runs/internal loops are being used and the argument is set
         # in the provided file.
@@ -1251,6 +1251,45 @@ class configurationClassErrors:
     self.writeFormattedText()
     self.terminate()
 
+  # The new parameter set could not be written.
+  def failedToWriteParameterSet(self, filename, parameterSetName):
+    self.text.append('Unable to write parameter set: ' + parameterSetName)
+    self.text.append('The parameter set \'' + parameterSetName + '\' could not be added to the parameter sets file \'' + filename + \
+    '\'. Please check that the directory containing this file exists and can be written to.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # The original parameter sets file is present alongside the parameter sets data file, so is ignored.
+  def ignoredParameterSetsFile(self, jsonFilename, dataFilename):
+    self.errorType = 'WARNING'
+    self.text.append('Parameter sets file is ignored: ' + jsonFilename)
+    self.text.append('The parameter sets are read from the file \'' + dataFilename + '\', so changes made to the file \'' + \
+    jsonFilename + '\' since its parameter sets were copied are not used. If this file contains parameter sets that are required, ' + \
+    'please add them to the parameter sets using the export parameter set option.')
+    self.writeFormattedText()
+    self.errorType = 'ERROR'
+    self.text      = []
+
+  # A gkno argument is used by multiple gkno arguments.
+  def conflictingGknoArguments(self, argument, longFormArgument, otherLongFormArgument):
+    self.text.append('Conflicting gkno arguments: ' + argument)
+    self.text.append('The argument \'' + argument + '\' is used by the gkno arguments \'' + longFormArgument + '\' and \'' + otherLongFormArgument + \
+    '\', so values supplied for this argument cannot be assigned to a single argument. Please ensure that the long and short forms of all ' + \
+    'gkno arguments are unique.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # The values in a parameter set were requested, but the parameter set was not read.
+  def parameterSetNotLoaded(self, name, parameterSetName, isPipeline):
+    runType = 'pipeline' if isPipeline else 'tool'
+    self.text.append('Parameter set for ' + runType + ' \'' + name + '\' has not been read: ' + parameterSetName)
+    self.text.append('The values of the arguments in the parameter set \'' + parameterSetName + '\' were requested, but this parameter set ' + \
+    'has not been read from the ' + runType + ' configuration file or the external parameter sets configuration file. Only the default ' + \
+    'parameter set and the parameter set requested on the command line are read, so the values for any other parameter set are not ' + \
+    'available.')
+    self.writeFormattedText()
+    self.terminate()
+
   ###################################################
   # Errors associated with getting node attributes. *
   ###################################################
@@ -1586,6 +1625,105 @@ class configurationClassErrors:
     self.writeFormattedText()
     self.terminate()
 
+  # Multiple tasks output to a stream read by the same task.
+  def multipleStreamProducers(self, task, producers):
+    self.text.append('Error with streaming task.')
+    self.text.append('The task \'' + task + '\' reads streams from multiple tasks (' + ', '.join(producers) + '). A task can only ' + \
+    'read from a single stream. Please check the pipeline configuration file and ensure that only one of these tasks outputs to a stream.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # The tasks cannot be ordered.
+  def impossibleWorkflowOrder(self, tasks, streamingTasks):
+    self.text.append('Unable to determine the order of the tasks.')
+    text = 'The pipeline tasks could not be placed in an order in which each task follows all of the tasks that it depends on'
+    if streamingTasks:
+      text += ' and each task outputting to a stream is immediately followed by the tasks reading the stream. The following tasks output ' + \
+      'to a stream: ' + ', '.join(streamingTasks) + '.'
+    else: text += '.'
+    self.text.append(text + ' The following tasks could not be ordered: ' + ', '.join(tasks) + '. Please check the pipeline configuration ' + \
+    'file for tasks that depend on each other.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # An unknown mode for combining the iterations of a task's options.
+  def invalidIterationMode(self, task, mode, allowedModes):
+    self.text.append('Invalid iteration mode.')
+    self.text.append('The iterations of the options for task \'' + task + '\' were requested using the mode \'' + str(mode) + \
+    '\', which is not recognised. The allowed modes are: ' + ', '.join(allowedModes) + '.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # Zipped options have different numbers of iterations.
+  def mismatchedIterationsInZip(self, task, options):
+    self.text.append('Options have different numbers of iterations.')
+    self.text.append('The iterations of the options for task \'' + task + '\' are combined in order, which requires all options with ' + \
+    'multiple values to have the same number of iterations. The following options have different numbers of iterations: ' + \
+    ', '.join([nodeID + ' (' + str(number) + ')' for nodeID, number in options]) + '. Please check the values supplied for these options.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # In cross mode, an output file node has no values for a combination of the task's options.
+  def missingCrossIterationOutputs(self, task, fileNodeID, iteration):
+    self.text.append('Missing outputs for task iteration.')
+    self.text.append('The iterations of the options for task \'' + task + '\' are combined using every combination of the options, ' + \
+    'but the output file node \'' + fileNodeID + '\' has no values for combination ' + str(iteration) + '. Each combination must ' + \
+    'have its own output files, otherwise multiple iterations would write the same files. Please ensure that output files are ' + \
+    'defined for every combination.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # A task reads a stream, but the tool has no instructions for handling a stream for the argument.
+  def noInputStreamInstructions(self, task, tool, argument):
+    self.text.append('Error with streaming task.')
+    self.text.append('The task \'' + task + '\' reads a stream for the argument \'' + argument + '\', but the configuration file for the ' + \
+    'tool \'' + tool + '\' does not describe how to handle a stream for this argument. Please add the \'if input is stream\' field to ' + \
+    'the argument in the tool configuration file, or ensure that the task does not read a stream.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # Tasks joined by streams have different numbers of iterations.
+  def mismatchedStreamIterations(self, tasks, numbers):
+    self.text.append('Error with streaming tasks.')
+    self.text.append('The tasks ' + ', '.join(tasks) + ' are joined by streams and so must be run together, but have different numbers of ' + \
+    'iterations (' + ', '.join([str(number) for number in numbers]) + '). Please check the values supplied to these tasks, or ensure ' + \
+    'that the tasks do not use streams.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # A task uses a feature that cannot be written by the pipeline executor.
+  def unsupportedExecutorFeature(self, task, tool, argument, feature):
+    self.text.append('Task cannot be run by the pipeline executor.')
+    if argument: text = 'The argument \'' + argument + '\' for task \'' + task + '\' (tool: ' + tool + ') uses a ' + feature + ', '
+    else: text = 'Task \'' + task + '\' (tool: ' + tool + ') uses a ' + feature + ', '
+    self.text.append(text + 'which is not supported when running the pipeline locally. Please generate and use a makefile to run ' + \
+    'this pipeline.')
+    self.writeFormattedText()
+    self.terminate()
+
+  # Problems were found with the input files or outputs before running the pipeline.
+  def preflightFailed(self, report):
+    descriptions = {}
+    descriptions['missing']                     = 'Input files that do not exist:'
+    descriptions['unreadable']                  = 'Input files that cannot be read:'
+    descriptions['directory']                   = 'Input files that are directories:'
+    descriptions['not a directory']             = 'Input directories that are not directories:'
+    descriptions['empty']                       = 'Input files that are empty:'
+    descriptions['invalid extension']           = 'Input files with an invalid extension:'
+    descriptions['output present']              = 'Output files that already exist:'
+    descriptions['missing output directory']    = 'Output directories that do not exist:'
+    descriptions['unwritable output directory'] = 'Output directories that cannot be written to:'
+
+    self.text.append('Problems with files.')
+    self.text.append('The input files and outputs were checked before running the pipeline, and the following problems were found. ' + \
+    'Please check the values supplied for these files.')
+    for problem in sorted(report.problems):
+      self.text.append('\t')
+      self.text.append(descriptions.get(problem, problem + ':'))
+      for nodeID, filename in report.problems[problem]: self.text.append('\t' + filename)
+    self.writeFormattedText()
+    self.terminate()
+
   ##############################
   # Terminate configurationClass
   ##############################
@@ -11,7 +11,61 @@ import json
 import os
 import sys
 
-class edgeAttributes:
+# Define a base class for the node and edge attribute classes. These classes define __slots__
+# to avoid holding a dictionary for every node and edge in the graph, so the state is
+# gathered from the slots explicitly to allow the attributes to be copied and pickled.
+class slottedAttributes(object):
+  __slots__ = ()
+
+  def __getstate__(self):
+    state = {}
+    for attribute in slotNames(type(self)):
+      if hasattr(self, attribute): state[attribute] = getattr(self, attribute)
+
+    return state
+
+  def __setstate__(self, state):
+    for attribute, value in state.items(): setattr(self, attribute, value)
+
+  # Return a shallow copy of the attributes.
+  def copy(self):
+    cls        = type(self)
+    attributes = cls.__new__(cls)
+    for attribute in slotNames(cls): setattr(attributes, attribute, getattr(self, attribute))
+
+    return attributes
+
+# Get the names of all slots defined by a class and its bases.
+def slotNames(cls):
+  try: return slotNamesCache[cls]
+  except KeyError:
+    names = []
+    for base in cls.__mro__: names.extend(getattr(base, '__slots__', ()))
+    slotNamesCache[cls] = tuple(names)
+
+    return slotNamesCache[cls]
+
+slotNamesCache = {}
+
+class edgeAttributes(slottedAttributes):
+  __slots__ = (
+    'commandLineArgument',
+    'evaluateCommand',
+    'ifInputIsStream',
+    'ifOutputIsStream',
+    'includeOnCommandLine',
+    'isFilenameStub',
+    'isGreedy',
+    'isInput',
+    'isOriginatingEdge',
+    'isRequired',
+    'isStreaming',
+    'longFormArgument',
+    'modifyArgument',
+    'readJson',
+    'shortFormArgument'
+  )
+
   def __init__(self):
     self.isFilenameStub = False
     self.isGreedy       = False
@@ -49,6 +103,11 @@ class edgeClass:
   def __init__(self):
     self.errors      = configurationClassErrors()
 
+    # Store template edge attributes for each tool argument, keyed on (tool, longFormArgument). Each
+    # template is stored with the tool argument attributes it was built from, so that templates built
+    # from an old tool configuration are not used.
+    self.edgeTemplates = {}
+
   # Define all of the edge attributes and add an edge to the graph.
   def addEdge(self, graph, nodeMethods, tools, sourceNodeID, targetNodeID, argument, isOriginatingEdge = False):
  
@@ -65,68 +124,94 @@ class edgeClass:
       print('edgeMethods.addEdge')
       self.errors.terminate()
 
-    # Create an attributes class.
+    # Copy the template attributes for this tool argument.
+    attributes = self.getEdgeTemplate(tools, tool, argument).copy()
+
+    # Store if this edge was listed as an originating edge in the configuration file.
+    attributes.isOriginatingEdge = isOriginatingEdge
+
+    # Add the edge to the graph and update the index of arguments connected to the task.
+    nodeMethods.addGraphEdge(graph, sourceNodeID, targetNodeID, attributes)
+
+  # Build the template edge attributes for all of the arguments of a tool. Templates are otherwise built
+  # as they are first needed.
+  def buildEdgeTemplates(self, tools, tool):
+    for argument in tools.getArguments(tool): self.getEdgeTemplate(tools, tool, argument)
+
+  # Get the template edge attributes for a tool argument, building the template if it does not exist.
+  # The template must not be modified, so the attributes should be copied before being attached to
+  # an edge.
+  def getEdgeTemplate(self, tools, tool, argument):
+    longFormArgument = tools.getLongFormArgument(tool, argument)
+    try:
+      argumentAttributes, attributes = self.edgeTemplates[(tool, longFormArgument)]
+      if argumentAttributes is tools.argumentAttributes[tool][longFormArgument]: return attributes
+    except KeyError: pass
+
+    attributes = self.buildEdgeTemplate(tools, tool, longFormArgument)
+    self.edgeTemplates[(tool, longFormArgument)] = (tools.argumentAttributes[tool][longFormArgument], attributes)
+
+    return attributes
+
+  # Define the edge attributes for a tool argument from the tool configuration file.
+  def buildEdgeTemplate(self, tools, tool, longFormArgument):
     attributes = edgeAttributes()
 
     # Find the values from the tool configuration file for this argument.
-    attributes.longFormArgument  = tools.getLongFormArgument(tool, argument)
-    attributes.shortFormArgument = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'shortFormArgument')
+    attributes.longFormArgument  = longFormArgument
+    attributes.shortFormArgument = tools.getArgumentAttribute(tool, longFormArgument, 'shortFormArgument')
 
     # Find the command line argument that should be used in the makefile, e.g. that the tool expects.
     # The configuration file may define a different value for consistency across the tools, but the
     # tool itself must be supplied with what it expects.
-    if tools.getArgumentAttribute(tool, attributes.longFormArgument, 'commandLineArgument') == None: attributes.commandLineArgument = attributes.longFormArgument
-    else: attributes.commandLineArgument = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'commandLineArgument')
+    if tools.getArgumentAttribute(tool, longFormArgument, 'commandLineArgument') == None: attributes.commandLineArgument = longFormArgument
+    else: attributes.commandLineArgument = tools.getArgumentAttribute(tool, longFormArgument, 'commandLineArgument')
 
     # Identify if the edge represents a filename stub.
-    attributes.isFilenameStub = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'isFilenameStub')
+    attributes.isFilenameStub = tools.getArgumentAttribute(tool, longFormArgument, 'isFilenameStub')
     if attributes.isFilenameStub == None: attributes.isFilenameStub = False
 
     # Determine if the option represents an input file.
-    attributes.isInput = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'isInput')
+    attributes.isInput = tools.getArgumentAttribute(tool, longFormArgument, 'isInput')
 
     # Check if the argument should be written to the comand line or not.
-    includeOnCommandLine = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'includeOnCommandLine')
+    includeOnCommandLine = tools.getArgumentAttribute(tool, longFormArgument, 'includeOnCommandLine')
     if includeOnCommandLine != None: attributes.includeOnCommandLine = includeOnCommandLine
 
     # Check if the argument needs to be modified when written to the command line.
-    modifyArgument = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'modifyArgument')
+    modifyArgument = tools.getArgumentAttribute(tool, longFormArgument, 'modifyArgument')
     if modifyArgument: attributes.modifyArgument = modifyArgument
 
     # Define how to handle streaming files.
-    attributes.ifOutputIsStream = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'outputStream')
-    attributes.ifInputIsStream  = tools.getArgumentAttribute(tool, attributes.longFormArgument, 'inputStream')
+    attributes.ifOutputIsStream = tools.getArgumentAttribute(tool, longFormArgument, 'outputStream')
+    attributes.ifInputIsStream  = tools.getArgumentAttribute(tool, longFormArgument, 'inputStream')
 
-    # Store if this edge was listed as an originating edge in the configuration file.
-    attributes.isOriginatingEdge = isOriginatingEdge
-
-    # Add the edge to the graph.
-    graph.add_edge(sourceNodeID, targetNodeID, attributes = attributes)
+    return attributes
 
   # If the argument is 'read json file', then this does not refer to an actual tool argument.
   # Instead, the output file associated with this node is in json format and will be read at
   # execution time by this tool to set arguments. If this is the case, just record on this
   # edge the fact that this is a json file.
-  def addJsonEdge(self, graph, sourceNodeID, targetNodeID):
+  def addJsonEdge(self, graph, nodeMethods, sourceNodeID, targetNodeID):
     attributes = edgeAttributes()
 
     # Since this edge does not represent an actual argument, leave the arguments as None. Set the readJson
     # flag to true. Also set the isInput flag as this node must be reading in a json file.
     attributes.readJson = True
     attributes.isInput  = True
-    graph.add_edge(sourceNodeID, targetNodeID, attributes = attributes)
+    nodeMethods.addGraphEdge(graph, sourceNodeID, targetNodeID, attributes)
 
   # If the values associated with an argument, the edge represents the use of data, but not an actual
   # command line argement. In this case, the only attribute to hang on the edge is the evaluateCommand
   # attribute.
-  def addEvaluateCommandEdge(self, graph, sourceNodeID, targetNodeID):
+  def addEvaluateCommandEdge(self, graph, nodeMethods, sourceNodeID, targetNodeID):
     attributes = edgeAttributes()
 
     # Since this edge does not represent an actual argument, leave the arguments as None. Set the readJson
     # flag to true. Also set the isInput flag as this node must be reading in a json file.
     attributes.evaluateCommand = True
     attributes.isInput         = True
-    graph.add_edge(sourceNodeID, targetNodeID, attributes = attributes)
+    nodeMethods.addGraphEdge(graph, sourceNodeID, targetNodeID, attributes)
 
   # Get an attribute from a graph edge.  Fail with sensible message if the edge or attribute does not exist.
   def getEdgeAttribute(self, graph, sourceNodeID, targetNodeID, attribute):
@@ -157,6 +242,10 @@ class edgeClass:
     self.getEdgeAttribute(graph, sourceNodeID, targetNodeID, attribute)
     setattr(graph[sourceNodeID][targetNodeID]['attributes'], attribute, value)
 
+    # Record that the graph has been modified (see nodeMethods.markGraphModified). If the graph has not
+    # been indexed, the indexes are new when built, so there is nothing to record.
+    if 'nodeIndexes' in graph.graph: graph.graph['nodeIndexes'].graphVersion += 1
+
   # Determine if an edge exists between two nodes.
   def checkIfEdgeExists(self, graph, sourceNodeID, targetNodeID):
     try: edge = graph[sourceNodeID][targetNodeID]
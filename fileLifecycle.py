@@ -0,0 +1,131 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import os
+import sys
+
+# Define a class holding the lifecycle of a file node: the task producing the files, the tasks using
+# them and the point in the workflow at which they can be deleted.
+class fileLifecycleRecord:
+  def __init__(self):
+
+    # The file node and the option node with which it is associated.
+    self.fileNodeID   = None
+    self.optionNodeID = None
+
+    # The task producing the files (None if the files are supplied to the pipeline) and the tasks
+    # using the files, in workflow order.
+    self.producer  = None
+    self.consumers = []
+
+    # The consuming tasks that receive the files as a stream.
+    self.streamingConsumers = set()
+
+    # The last task in the workflow using the option node, and its position in the workflow. This is
+    # the point at which the files can be deleted.
+    self.lastConsumer         = None
+    self.lastConsumerPosition = None
+
+    # Attributes of the file and option nodes.
+    self.deleteFiles = False
+    self.isDirectory = False
+    self.isStreaming = False
+    self.isTemporary = False
+
+    # The values associated with the file node, keyed by iteration.
+    self.values = {}
+
+  # Determine if the files are intermediate files, i.e. they are produced and used by tasks in the pipeline.
+  def isIntermediate(self):
+    return self.producer != None and len(self.consumers) > 0
+
+  # Get the status of the files: 'stream' if the files are streamed, 'delete' if they are intermediate
+  # files marked for deletion, and 'keep' otherwise.
+  def getStatus(self):
+    if self.isStreaming: return 'stream'
+    if self.deleteFiles and not self.isDirectory and self.isIntermediate(): return 'delete'
+    return 'keep'
+
+# Define a class holding the lifecycle of every file in the graph. The index is built once the workflow
+# is fixed and records, for each file node, the tasks producing and using the files. Each file value is
+# mapped to the file node with which it is associated. The index describes the graph as it was when the
+# index was built, so if the graph is modified, a new index must be built.
+class fileLifecycleIndex:
+  def __init__(self, graph, nodeMethods, edgeMethods, workflow):
+    self.errors   = configurationClassErrors()
+    self.workflow = list(workflow)
+
+    # Store the position of each task in the workflow.
+    self.positions = dict((task, position) for position, task in enumerate(self.workflow))
+
+    # Store the lifecycle record of each file node, and the input and output file nodes of each task,
+    # in the order given by the node methods.
+    self.records = {}
+    self.inputs  = {}
+    self.outputs = {}
+
+    # Store the last task in the workflow using each option node.
+    self.lastConsumers = {}
+
+    # Map each file value, keyed by the option node and the value, to the file node.
+    self.fileValues = {}
+
+    for task in nodeMethods.getNodes(graph, 'task'):
+      self.inputs[task]  = list(nodeMethods.getPredecessorFileNodes(graph, task))
+      self.outputs[task] = list(nodeMethods.getSuccessorFileNodes(graph, task))
+
+    for fileNodeID in nodeMethods.getNodes(graph, 'file'):
+      record              = fileLifecycleRecord()
+      record.fileNodeID   = fileNodeID
+      record.optionNodeID = nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
+      record.isStreaming  = nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'isStreaming')
+      record.values       = nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
+      if record.optionNodeID in graph.node:
+        record.deleteFiles = nodeMethods.getGraphNodeAttribute(graph, record.optionNodeID, 'deleteFiles')
+        record.isDirectory = nodeMethods.getGraphNodeAttribute(graph, record.optionNodeID, 'isDirectory')
+        record.isTemporary = nodeMethods.getGraphNodeAttribute(graph, record.optionNodeID, 'isTemporary')
+        record.lastConsumer, record.lastConsumerPosition = self.getLastConsumer(graph, record.optionNodeID)
+
+      for producer in graph.pred[fileNodeID]:
+        record.producer = producer
+        break
+
+      record.consumers = sorted(graph.succ[fileNodeID], key = lambda task: self.positions.get(task, len(self.workflow)))
+      for consumer in record.consumers:
+        if edgeMethods.getEdgeAttribute(graph, fileNodeID, consumer, 'isStreaming'): record.streamingConsumers.add(consumer)
+
+      self.records[fileNodeID] = record
+      for iteration in record.values:
+        for value in record.values[iteration]: self.fileValues[(record.optionNodeID, value)] = fileNodeID
+
+  # Find the last task in the workflow using an option node. If none of the tasks using the option node
+  # are in the workflow, the first task in the workflow is used.
+  def getLastConsumer(self, graph, optionNodeID):
+    if optionNodeID in self.lastConsumers: return self.lastConsumers[optionNodeID]
+
+    lastConsumer = (self.workflow[0], 0) if self.workflow else (None, None)
+    for task in graph.succ[optionNodeID]:
+      if task in self.positions and self.positions[task] >= lastConsumer[1]: lastConsumer = (task, self.positions[task])
+    self.lastConsumers[optionNodeID] = lastConsumer
+
+    return lastConsumer
+
+  # Get the lifecycle record of a file node.
+  def getRecord(self, fileNodeID):
+    return self.records[fileNodeID]
+
+  # Get the lifecycle record of a file value. Return None if the value is not associated with a file node.
+  def getValueRecord(self, optionNodeID, value):
+    fileNodeID = self.fileValues.get((optionNodeID, value))
+    return self.records[fileNodeID] if fileNodeID else None
+
+  # Get the records of the input or output files of a task.
+  def getInputRecords(self, task):
+    return [self.records[fileNodeID] for fileNodeID in self.inputs.get(task, ())]
+
+  def getOutputRecords(self, task):
+    return [self.records[fileNodeID] for fileNodeID in self.outputs.get(task, ())]
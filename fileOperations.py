@@ -16,6 +16,10 @@ from edgeAttributes import *
 import json
 import os
 import sys
+import tempfile
+
+try: import cPickle as pickle
+except ImportError: import pickle
 
 class fileOperations:
   def __init__(self):
@@ -37,3 +41,43 @@ class fileOperations:
       else: return False
 
     return configurationData
+
+  # Read data from a pickle file. If the file cannot be read, return None.
+  def readPickleFile(self, filename):
+    try:
+      with open(filename, 'rb') as filehandle: return pickle.load(filehandle)
+    except Exception: return None
+
+  # Write data to a pickle file. Return False if the file could not be written.
+  def writePickleFile(self, filename, data):
+    return self.writeFileAtomically(filename, lambda filehandle: pickle.dump(data, filehandle, pickle.HIGHEST_PROTOCOL))
+
+  # Write data to a json file. Return False if the file could not be written.
+  def writeJsonFile(self, filename, data):
+    return self.writeFileAtomically(filename, lambda filehandle: json.dump(data, filehandle, indent = 2, sort_keys = True))
+
+  # Write a file using the supplied method. The data is written to a temporary file which then replaces
+  # the file, so that a partially written file is never read. Return False if the file could not be
+  # written.
+  def writeFileAtomically(self, filename, write):
+    directory         = os.path.dirname(os.path.abspath(filename))
+    temporaryFilename = None
+    try:
+      if not os.path.isdir(directory): os.makedirs(directory)
+      descriptor, temporaryFilename = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+      with os.fdopen(descriptor, 'wb') as filehandle: write(filehandle)
+      self.replaceFile(temporaryFilename, filename)
+    except (IOError, OSError, TypeError, ValueError, pickle.PicklingError):
+      if temporaryFilename:
+        try: os.remove(temporaryFilename)
+        except OSError: pass
+      return False
+
+    return True
+
+  # Replace a file with another. On Windows, os.rename fails if the target exists.
+  def replaceFile(self, source, target):
+    try: os.rename(source, target)
+    except OSError:
+      os.remove(target)
+      os.rename(source, target)
@@ -0,0 +1,145 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import itertools
+import os
+import sys
+
+# Define a class for iterating over the data sets of the tasks in the graph. The values of option and
+# file nodes are dictionaries keyed by iteration. When the values for an iteration are requested, the
+# values for that iteration are used if they exist. Otherwise, the values for the first iteration are
+# used (the values are broadcast to all iterations). The iterations of a task are determined by the
+# option nodes feeding the task, and can be combined in one of the following ways:
+#
+#   broadcast: the task has the number of iterations given by getNumberOfIterations (the number of data
+#              sets determined by getNumberOfDataSets). Each option uses its values for the iteration,
+#              or those for the first iteration if it has none;
+#   zip:       as broadcast, but all options with multiple data sets must have the same number;
+#   cross:     the task has an iteration for every combination of the data sets of its options. The
+#              output file nodes must have values for every combination.
+#
+# Greedy options use all of their values in every iteration.
+class iterationEngine:
+  def __init__(self, nodeMethods, edgeMethods):
+    self.errors      = configurationClassErrors()
+    self.edgeMethods = edgeMethods
+    self.nodeMethods = nodeMethods
+
+    # Define the ways in which the iterations of options can be combined.
+    self.modes = ['broadcast', 'zip', 'cross']
+
+  # Get the iterations of a node's values to use for the requested iteration. If the iteration is 'all',
+  # all iterations are used. If the iteration cannot be found, return None.
+  def getIterationKeys(self, values, iteration):
+    if iteration == 'all': return values.keys()
+    elif iteration in values: return [iteration]
+    elif iteration != 1: return [1]
+    else: return None
+
+  # Generate the values of a node for the requested iteration. A node without values for the first
+  # iteration has no values to broadcast to other iterations.
+  def getIterationValues(self, values, iteration):
+    for key in self.getIterationKeys(values, iteration) or []:
+      for value in values.get(key, ()): yield value
+
+  # Get the number of iterations of a task (other than in cross mode). This is the largest number of data
+  # sets of any option feeding the task. If the task is greedy, and only input files have multiple data
+  # sets, all of the data sets are used together and the task has a single iteration.
+  def getNumberOfIterations(self, graph, task):
+    totalNumber                  = 0
+    isGreedy                     = False
+    hasMultipleInputFiles        = False
+    hasMultipleNonFileParameters = False
+    for nodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
+      numberOfDataSets = len(self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'values'))
+      isInput          = self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'isInput')
+      isFile           = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'isFile')
+
+      # Record if this task has multiple input files.
+      if isInput and numberOfDataSets > 1: hasMultipleInputFiles = True
+
+      # Record if this task has multiple iterations of a non filename parameter.
+      if not isFile and numberOfDataSets > 1: hasMultipleNonFileParameters = True
+
+      # Update the number of data sets.
+      if numberOfDataSets > totalNumber: totalNumber = numberOfDataSets
+
+      # Check if this option is greedy. If the task has a greedy argument, then the number
+      # of data sets is one. This is only true if the input argument with multiple values is a
+      # file. For example, if there is a single input file and multiple parameters, there will
+      # be multiple output files, even though the task is greedy.
+      if self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'isGreedy'): isGreedy = True
+
+    #TODO Check the inclusion of hasMultipleNonFileParameters does not break things.
+    if isGreedy and hasMultipleInputFiles and not hasMultipleNonFileParameters: return 1
+    return totalNumber
+
+  # Generate the iterations of a task. For each iteration, the iteration number and the iteration of each
+  # option node to use ('all' for greedy options) are generated.
+  def getTaskIterations(self, graph, task, mode = 'broadcast'):
+    if mode not in self.modes: self.errors.invalidIterationMode(task, mode, self.modes)
+
+    # Find the iterations of each option node with values.
+    greedyNodeIDs = []
+    optionKeys    = []
+    for nodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
+      values = self.nodeMethods.getGraphNodeAttribute(graph, nodeID, 'values')
+      if values:
+        if self.edgeMethods.getEdgeAttribute(graph, nodeID, task, 'isGreedy'): greedyNodeIDs.append(nodeID)
+        else: optionKeys.append((nodeID, sorted(values.keys())))
+
+    selection = dict((nodeID, 'all') for nodeID in greedyNodeIDs)
+
+    # Each iteration of the task uses every combination of the option iterations.
+    if mode == 'cross':
+      nodeIDs = [nodeID for nodeID, keys in optionKeys]
+      for iteration, keys in enumerate(itertools.product(*[keys for nodeID, keys in optionKeys])):
+        selection.update(zip(nodeIDs, keys))
+        yield iteration + 1, dict(selection)
+      return
+
+    # Determine the number of iterations. For zipped options, all options with multiple iterations must
+    # have the same number.
+    numbers            = set(len(keys) for nodeID, keys in optionKeys)
+    numberOfIterations = max(self.getNumberOfIterations(graph, task), 1)
+    if mode == 'zip' and len(numbers - set([1])) > 1:
+      self.errors.mismatchedIterationsInZip(task, [(nodeID, len(keys)) for nodeID, keys in optionKeys if len(keys) > 1])
+
+    for iteration in range(1, numberOfIterations + 1):
+      for nodeID, keys in optionKeys: selection[nodeID] = iteration if iteration in keys else 1
+      yield iteration, dict(selection)
+
+  # Generate the input and output files of each iteration of a task, as (task, iteration, inputs, outputs).
+  # Streaming files are not included. Temporary files are not included in the outputs.
+  def iterateTask(self, graph, task, mode = 'broadcast'):
+    for iteration, selection in self.getTaskIterations(graph, task, mode):
+      inputs = []
+      for fileNodeID in self.nodeMethods.getPredecessorFileNodes(graph, task):
+        if not self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'isStreaming'):
+          optionNodeID = self.nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
+          values       = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
+          inputs.extend(self.getIterationValues(values, selection.get(optionNodeID, iteration)))
+
+      outputs = []
+      for fileNodeID in self.nodeMethods.getSuccessorFileNodes(graph, task):
+        optionNodeID = self.nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
+        isStreaming  = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'isStreaming')
+        isTemporary  = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'isTemporary')
+        if not isStreaming and not isTemporary:
+          values = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values')
+
+          # Each combination in cross mode must have its own outputs, otherwise multiple iterations would
+          # write the same files.
+          if mode == 'cross' and iteration not in values and iteration != 1: self.errors.missingCrossIterationOutputs(task, fileNodeID, iteration)
+          outputs.extend(self.getIterationValues(values, iteration))
+
+      yield task, iteration, inputs, outputs
+
+  # Generate the input and output files of each iteration of each of the supplied tasks.
+  def iterateWorkflow(self, graph, tasks, mode = 'broadcast'):
+    for task in tasks:
+      for item in self.iterateTask(graph, task, mode): yield item
@@ -0,0 +1,121 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+import networkx as nx
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import os
+import sys
+
+# Define a class holding the input of a task from a task earlier in the pipeline.
+class taskInput:
+  def __init__(self):
+
+    # The task producing the input and the file node linking the tasks.
+    self.fileNodeID = None
+    self.task       = None
+
+    # The iterations for which the file node has values.
+    self.iterations = []
+
+    # If the input is greedy, every iteration of the task uses all iterations of the input.
+    self.isGreedy = False
+
+# Define a graph whose nodes are (task, iteration) pairs. An iteration of a task depends on the
+# iterations of earlier tasks that produce its input files. As with getTaskDependencies, iteration
+# i uses iteration i of an input if the input has that iteration, and otherwise uses iteration 1,
+# while a greedy input is used in full. Each task has the number of iterations determined by
+# getNumberOfDataSets, so tasks collapsed by a greedy argument have a single iteration. The links
+# between tasks are found when the class is created. The links between iterations are only found
+# when requested.
+class iterationGraph:
+  def __init__(self, graph, nodeMethods, edgeMethods, workflow):
+    self.errors   = configurationClassErrors()
+    self.workflow = list(workflow)
+
+    # Store the number of iterations of each task.
+    self.numberOfIterations = {}
+
+    # Store the inputs to each task from other tasks, and the tasks using each task's outputs.
+    self.inputs    = {}
+    self.consumers = {}
+
+    for task in self.workflow:
+      self.numberOfIterations[task] = max(nodeMethods.getGraphNodeAttribute(graph, task, 'numberOfDataSets'), 1)
+      self.inputs[task]             = []
+      self.consumers[task]          = []
+
+    for task in self.workflow:
+      for fileNodeID in nodeMethods.getPredecessorFileNodes(graph, task):
+        optionNodeID = nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
+        isGreedy     = False
+        if edgeMethods.checkIfEdgeExists(graph, optionNodeID, task): isGreedy = edgeMethods.getEdgeAttribute(graph, optionNodeID, task, 'isGreedy')
+        iterations = sorted(nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'values').keys())
+
+        for producer in graph.pred[fileNodeID]:
+          if producer not in self.numberOfIterations: continue
+          attributes            = taskInput()
+          attributes.fileNodeID = fileNodeID
+          attributes.task       = producer
+          attributes.isGreedy   = isGreedy
+          attributes.iterations = iterations if iterations else range(1, self.numberOfIterations[producer] + 1)
+          self.inputs[task].append(attributes)
+          if task not in self.consumers[producer]: self.consumers[producer].append(task)
+
+  # Generate the nodes of the graph in workflow order.
+  def getNodes(self):
+    for task in self.workflow:
+      for iteration in range(1, self.numberOfIterations[task] + 1): yield (task, iteration)
+
+  # Get the number of nodes in the graph.
+  def getNumberOfNodes(self):
+    return sum(self.numberOfIterations.values())
+
+  # Get the iterations of an input used by an iteration of a task.
+  def getInputIterations(self, attributes, iteration):
+    if attributes.isGreedy: return attributes.iterations
+    if iteration in attributes.iterations: return [iteration]
+    if iteration != 1 and 1 in attributes.iterations: return [1]
+    return []
+
+  # Get the (task, iteration) nodes that an iteration of a task depends on.
+  def getPredecessors(self, task, iteration):
+    predecessors = set()
+    for attributes in self.inputs[task]:
+      for inputIteration in self.getInputIterations(attributes, iteration):
+        if inputIteration <= self.numberOfIterations[attributes.task]: predecessors.add((attributes.task, inputIteration))
+
+    return sorted(predecessors)
+
+  # Get the (task, iteration) nodes that depend on an iteration of a task.
+  def getSuccessors(self, task, iteration):
+    successors = set()
+    for consumer in self.consumers[task]:
+      for attributes in self.inputs[consumer]:
+        if attributes.task != task or iteration not in attributes.iterations: continue
+
+        # Greedy inputs are used by every iteration of the consumer.
+        if attributes.isGreedy: consumerIterations = range(1, self.numberOfIterations[consumer] + 1)
+
+        # Otherwise, the iteration is used by the same iteration of the consumer and, for the first
+        # iteration, by any iterations of the consumer that the input does not have.
+        else:
+          consumerIterations = [iteration] if iteration <= self.numberOfIterations[consumer] else []
+          if iteration == 1:
+            inputIterations     = set(attributes.iterations)
+            consumerIterations += [i for i in range(2, self.numberOfIterations[consumer] + 1) if i not in inputIterations]
+
+        for consumerIteration in consumerIterations: successors.add((consumer, consumerIteration))
+
+    return sorted(successors)
+
+  # Build the full graph as a networkx DiGraph.
+  def buildGraph(self):
+    expandedGraph = nx.DiGraph()
+    for task, iteration in self.getNodes():
+      expandedGraph.add_node((task, iteration))
+      for predecessor in self.getPredecessors(task, iteration): expandedGraph.add_edge(predecessor, (task, iteration))
+
+    return expandedGraph
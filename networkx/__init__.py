@@ -52,8 +52,6 @@ __version__ = release.version
 
 #These are import orderwise
 from networkx.exception import  *
-import networkx.external
-import networkx.utils
 # these packages work with Python >= 2.6
 
 import networkx.classes
@@ -66,20 +64,74 @@ from networkx.convert import *
 import networkx.relabel
 from networkx.relabel import *
 
-import networkx.generators
-from networkx.generators import *
-
-import networkx.readwrite
-from networkx.readwrite import *
-
+# The remaining subpackages are imported when first used, which keeps the
+# import of networkx cheap for programs that only need the graph classes.
+# Accessing networkx.<subpackage> imports that subpackage.  Accessing any
+# other missing name imports the subpackages whose contents are exported at
+# the top level, in the order in which they were previously imported, so that
+# names resolve as they did when all of the subpackages were imported here.
+#
 #Need to test with SciPy, when available
-import networkx.algorithms
-from networkx.algorithms import *
-import networkx.linalg
-
-from networkx.linalg import *
 #from networkx.tests.test import run as test
-
-import networkx.drawing
-from networkx.drawing import *
-
+_lazy_subpackages = ('external', 'utils', 'generators', 'readwrite',
+                     'algorithms', 'linalg', 'drawing')
+_exported_subpackages = ('generators', 'readwrite', 'algorithms', 'linalg',
+                         'drawing')
+
+import sys as _sys
+import types as _types
+
+
+class _LazyModule(_types.ModuleType):
+    """Module type for networkx that imports subpackages on first use."""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in _lazy_subpackages:
+            return self._import_subpackage(name)
+        if not self.__dict__.get('_exported', False):
+            self._import_exported_subpackages()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError("'module' object has no attribute '%s'" % name)
+
+    def __dir__(self):
+        self._import_exported_subpackages()
+        return sorted(self.__dict__)
+
+    def _import_subpackage(self, name):
+        __import__('networkx.' + name)
+        return _sys.modules['networkx.' + name]
+
+    def _import_exported_subpackages(self):
+        if self.__dict__.get('_exported', False):
+            return
+        self._exported = True
+        for subpackage in _exported_subpackages:
+            module = self._import_subpackage(subpackage)
+            names = getattr(module, '__all__', None)
+            if names is None:
+                names = [n for n in module.__dict__ if not n.startswith('_')]
+            for n in names:
+                setattr(self, n, getattr(module, n))
+
+
+def _install_lazy_module():
+    module = _sys.modules[__name__]
+    lazy_module = _LazyModule(__name__, __doc__)
+    lazy_module.__dict__.update(module.__dict__)
+    # Keep a reference to this module, since its globals are cleared when it
+    # is garbage collected.
+    lazy_module._module = module
+    _sys.modules[__name__] = lazy_module
+    # Modules imported above bound this module as 'nx' before it was
+    # replaced, so point them at the lazy module.
+    for name, submodule in list(_sys.modules.items()):
+        if submodule is None or not name.startswith(__name__ + '.'):
+            continue
+        for attribute, value in list(submodule.__dict__.items()):
+            if value is module:
+                setattr(submodule, attribute, lazy_module)
+
+_install_lazy_module()
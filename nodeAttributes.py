@@ -2,6 +2,7 @@
 
 from __future__ import print_function
 import networkx as nx
+from collections import OrderedDict
 from copy import deepcopy
 
 import configurationClassErrors
@@ -17,7 +18,23 @@ import os
 import sys
 
 # Define a class for holding attributes for task nodes.
-class taskNodeAttributes:
+class taskNodeAttributes(slottedAttributes):
+  __slots__ = (
+    'delimiter',
+    'description',
+    'executable',
+    'hasMultipleIterations',
+    'isGreedy',
+    'isHidden',
+    'modifier',
+    'nodeType',
+    'numberOfDataSets',
+    'outputStream',
+    'path',
+    'precommand',
+    'tool'
+  )
+
   def __init__(self):
 
     # Describe the delimiter to use when writing out the command line. Typically, this is
@@ -62,7 +79,37 @@ class taskNodeAttributes:
 
 # Define a class for holding attributes for options nodes.  These are nodes that
 # hold option data, but are not files.
-class optionNodeAttributes:
+class optionNodeAttributes(slottedAttributes):
+  __slots__ = (
+    'allowMultipleValues',
+    'allowedExtensions',
+    'associatedFileNodes',
+    'dataType',
+    'deleteFiles',
+    'description',
+    'filenameExtensions',
+    'hasMultipleDataSets',
+    'hasMultipleValues',
+    'hasValue',
+    'isCommandToEvaluate',
+    'isConstructed',
+    'isDirectory',
+    'isFile',
+    'isFilenameStub',
+    'isInput',
+    'isMarkedForRemoval',
+    'isOutput',
+    'isPipelineArgument',
+    'isRequired',
+    'isStream',
+    'isTemporary',
+    'isValuesModified',
+    'linkedExtension',
+    'nodeType',
+    'numberOfDataSets',
+    'values'
+  )
+
   def __init__(self):
     self.allowedExtensions   = []
     self.allowMultipleValues = False
@@ -108,7 +155,21 @@ class optionNodeAttributes:
 
 # Define a class for holding attributes for file nodes.  These are nodes that
 # hold information about files.
-class fileNodeAttributes:
+class fileNodeAttributes(slottedAttributes):
+  __slots__ = (
+    'allowMultipleValues',
+    'allowedExtensions',
+    'description',
+    'hasMultipleDataSets',
+    'hasMultipleValues',
+    'hasValue',
+    'isMarkedForRemoval',
+    'isStreaming',
+    'nodeType',
+    'numberOfDataSets',
+    'values'
+  )
+
   def __init__(self):
     self.allowMultipleValues = False
     self.allowedExtensions   = []
@@ -126,17 +187,57 @@ class fileNodeAttributes:
     # File node represents a streaming file.
     self.isStreaming = False
 
+# Define a class for holding indexes over the nodes in a graph. The indexes are stored in the
+# graph attributes dictionary (graph.graph), so that they are copied along with the graph.
+class nodeIndexes:
+  def __init__(self):
+
+    # Record the number of nodes in the graph when the indexes were last updated. If nodes are
+    # added or removed without using the node methods, the numbers will differ and the indexes
+    # will be rebuilt.
+    self.numberOfNodes = 0
+
+    # Store the nodes of each type (e.g. task, option, file and general), in the order in which they were
+    # added, and the nodes that have been marked for removal.
+    self.nodes            = {}
+    self.markedForRemoval = set()
+
+    # Store the file nodes associated with each option node.
+    self.associatedFileNodes = {}
+
+    # Store the predecessors and successors of each node, split by node type. Each entry also holds
+    # the number of neighbours the node had when the entry was built, so that out of date entries
+    # can be identified.
+    self.predecessors = {}
+    self.successors   = {}
+
+    # For each task, store the nodes connected to the task, keyed on the node type and then the
+    # long form argument associated with the edge. The number of predecessors the task had when
+    # the entry was built is also stored, so that out of date entries can be identified.
+    self.taskArguments            = {}
+    self.numberOfTaskPredecessors = {}
+
+    # Count the number of times the graph has been modified (nodes or edges added or removed, or node or
+    # edge attributes set) using the node and edge methods, so that data derived from the graph can be
+    # identified as out of date.
+    self.graphVersion = 0
+
 class nodeClass:
   def __init__(self):
     self.edgeMethods  = edgeClass()
     self.errors       = configurationClassErrors()
     self.optionNodeID = 1
 
+    # Store prototype option node attributes for each tool argument, keyed on (tool, argument). Each
+    # prototype is stored with the tool argument attributes it was built from, so that prototypes built
+    # from an old tool configuration are not used.
+    self.optionNodePrototypes = {}
+
   # Build an option node.
   def buildOptionNode(self, graph, tools, task, tool, argument, attributes):
     nodeID = str('OPTION_') + str(self.optionNodeID)
     self.optionNodeID += 1
-    graph.add_node(nodeID, attributes = attributes)
+    self.addGraphNode(graph, nodeID, attributes)
 
     # Add an edge to the task node.
     self.edgeMethods.addEdge(graph, self, tools, nodeID, task, argument)
@@ -149,9 +250,31 @@ class nodeClass:
 
     return nodeID
 
-  # Build a node using information from the tool configuration file.
+  # Build a node using information from the tool configuration file. The attributes are copied from a
+  # prototype for the tool argument. List attributes are shared with the prototype, so must be replaced
+  # rather than modified in place.
   def buildNodeFromToolConfiguration(self, tools, tool, argument):
-    isFilenameStub = False
+    attributes                     = self.getOptionNodePrototype(tools, tool, argument).copy()
+    attributes.associatedFileNodes = []
+    attributes.values              = {}
+
+    return attributes
+
+  # Get the prototype option node attributes for a tool argument, building the prototype if it does
+  # not exist.
+  def getOptionNodePrototype(self, tools, tool, argument):
+    try:
+      argumentAttributes, attributes = self.optionNodePrototypes[(tool, argument)]
+      if argumentAttributes is tools.argumentAttributes[tool][argument]: return attributes
+    except KeyError: pass
+
+    attributes = self.buildOptionNodePrototype(tools, tool, argument)
+    self.optionNodePrototypes[(tool, argument)] = (tools.argumentAttributes[tool][argument], attributes)
+
+    return attributes
+
+  # Build the option node attributes for a tool argument from the tool configuration file.
+  def buildOptionNodePrototype(self, tools, tool, argument):
 
     # Set the tool argument information.
     attributes = optionNodeAttributes()
@@ -172,9 +295,7 @@ class nodeClass:
       extensions = tools.getArgumentAttribute(tool, argument, 'filenameExtensions')
       if extensions == None: self.errors.filenameStubWithNoExtensions(tool, argument)
 
-      for counter, extension in enumerate(extensions): extensions[counter] = str(extension)
-      self.setNodeAttribute(attributes, 'filenameExtensions', extensions)
-      isFilenameStub = True
+      self.setNodeAttribute(attributes, 'filenameExtensions', [str(extension) for extension in extensions])
 
     # If multiple extensions are allowed, they will be separated by pipes in the configuration
     # file. Add all allowed extensions to the list.
@@ -197,7 +318,7 @@ class nodeClass:
         fileNodeID = nodeID + '_FILE_' + str(fileID)
         fileID += 1
         self.setNodeAttribute(attributes, 'allowedExtensions', [str(extension)])
-        graph.add_node(fileNodeID, attributes = attributes)
+        self.addGraphNode(graph, fileNodeID, attributes)
         fileNodeIDs.append(fileNodeID)
     else:
       fileNodeID = nodeID + '_FILE'
@@ -205,7 +326,7 @@ class nodeClass:
       self.setNodeAttribute(attributes, 'description', self.getGraphNodeAttribute(graph, nodeID, 'description'))
       self.setNodeAttribute(attributes, 'allowMultipleValues', self.getGraphNodeAttribute(graph, nodeID, 'allowMultipleValues'))
       self.setNodeAttribute(attributes, 'allowedExtensions', self.getGraphNodeAttribute(graph, nodeID, 'allowedExtensions'))
-      graph.add_node(fileNodeID, attributes = attributes)
+      self.addGraphNode(graph, fileNodeID, attributes)
       fileNodeIDs.append(fileNodeID)
 
     # Add the edges.
@@ -231,7 +352,7 @@ class nodeClass:
     self.setNodeAttribute(attributes, 'path', tools.getGeneralAttribute(tool, 'path'))
     self.setNodeAttribute(attributes, 'precommand', tools.getGeneralAttribute(tool, 'precommand'))
     self.setNodeAttribute(attributes, 'outputStream', pipeline.getTaskAttribute(task, 'outputStream'))
-    graph.add_node(task, attributes = attributes)
+    self.addGraphNode(graph, task, attributes)
 
   # Build all of the predecessor nodes for the task and attach them to the task node.
   def buildRequiredPredecessorNodes(self, graph, tools, pipeline, task):
@@ -285,13 +406,8 @@ class nodeClass:
 
   # Check if a node exists based on a task and an argument.
   def doesNodeExist(self, graph, task, argument):
-    exists = False
-    for sourceNodeID, targetNodeID in graph.in_edges(task):
-      edgeArgument = self.edgeMethods.getEdgeAttribute(graph, sourceNodeID, targetNodeID, 'longFormArgument')
-      nodeType     = self.getGraphNodeAttribute(graph, sourceNodeID, 'nodeType')
-      if nodeType == 'option' and edgeArgument == argument:
-        exists = True
-        return sourceNodeID
+    nodeIDs = self.getTaskArgumentNodes(graph, task, argument, 'option')
+    if nodeIDs: return nodeIDs[0]
 
     return None
 
@@ -411,12 +527,19 @@ class nodeClass:
     if replace or type(getattr(graph.node[nodeID]['attributes'], attribute)) != list:
       setattr(graph.node[nodeID]['attributes'], attribute, value)
 
-    # If the attribute points to a list, append the value.
+    # If the attribute points to a list, append the value. The list may be shared with other nodes, so
+    # a new list is created rather than modifying the existing list.
     else:
-      valueList = getattr(graph.node[nodeID]['attributes'], attribute)
-      valueList.append(value)
+      valueList = getattr(graph.node[nodeID]['attributes'], attribute) + [value]
       setattr(graph.node[nodeID]['attributes'], attribute, valueList)
 
+    # Keep the set of nodes marked for removal up to date.
+    if attribute == 'isMarkedForRemoval':
+      indexes = self.getNodeIndexes(graph)
+      if value: indexes.markedForRemoval.add(nodeID)
+      else: indexes.markedForRemoval.discard(nodeID)
+    self.markGraphModified(graph)
+
   #TODO IS THIS USED?
   # Set an attribute from the nodes data structure.  In this method, the node is not a part of the graph and
   # so the node itself is given to the method.
@@ -446,6 +569,7 @@ class nodeClass:
 
     # Since values have been added to the node, set the hasValue flag to True.
     self.setGraphNodeAttribute(graph, nodeID, 'hasValue', True)
+    self.markGraphModified(graph)
 
     # If write is set to replace, set the number of datasets to 1, clear any values currently
     # set and add the new values.
@@ -509,25 +633,13 @@ class nodeClass:
     self.setGraphNodeAttribute(graph, nodeID, 'values', values)
     self.setGraphNodeAttribute(graph, nodeID, 'numberOfDataSets', numberOfDataSets)
 
-  # Find all of the task nodes in the graph.
+  # Find all of the nodes of a given type in the graph, in the order in which they were added.
   def getNodes(self, graph, nodeType):
-    nodeList = []
-    for node in graph.nodes(data = False):
-      if self.getGraphNodeAttribute(graph, node, 'nodeType') == nodeType: nodeList.append(node)
-
-    return nodeList
+    return list(self.getNodeIndexes(graph).nodes.get(nodeType, ()))
 
   # Get the node associated with a tool argument.
   def getNodeForTaskArgument(self, graph, task, argument, nodeType):
-    nodeIDs          = []
-    for predecessorEdge in graph.in_edges(task):
-      value = self.edgeMethods.getEdgeAttribute(graph, predecessorEdge[0], predecessorEdge[1], 'longFormArgument')
-      if value == argument:
-
-        # Only return a value if this node is of the requested type.
-        if self.getGraphNodeAttribute(graph, predecessorEdge[0], 'nodeType') == nodeType: nodeIDs.append(predecessorEdge[0])
-
-    return nodeIDs
+    return list(self.getTaskArgumentNodes(graph, task, argument, nodeType))
 
   # Get all file nodes associated with a task.
   def getFileNodeIDs(self, graph, task):
@@ -553,80 +665,62 @@ class nodeClass:
     for nodeID in successorIDs:
       if self.getGraphNodeAttribute(graph, nodeID, 'nodeType') == 'file': nodeIDs.append(nodeID)
 
-  # Get all predecessor file nodes for a task.
+  # Get all predecessor option nodes for a task.
   def getPredecessorOptionNodes(self, graph, task):
-    optionNodes = []
-
-    try: predecessors = graph.predecessors(task)
-    except:
+    return self.getTypedPredecessors(graph, task, 'option')
 
-      #TODO SORT OUT ERROR MESSAGE.
-      print('failed')
-
-    for predecessor in predecessors:
-      if self.getGraphNodeAttribute(graph, predecessor, 'nodeType') == 'option': optionNodes.append(predecessor)
-
-    return optionNodes
-
-  # Get all successor file nodes for a task.
+  # Get all successor option nodes for a task.
   def getSuccessorOptionNodes(self, graph, task):
-    optionNodes = []
-
-    try: successors = graph.successors(task)
-    except:
-
-      #TODO SORT OUT ERROR MESSAGE.
-      print('failed')
-
-    for successor in successors:
-      if self.getGraphNodeAttribute(graph, successor, 'nodeType') == 'option': optionNodes.append(successor)
-
-    return optionNodes
+    return self.getTypedSuccessors(graph, task, 'option')
 
   # Get all predecessor file nodes for a task.
   def getPredecessorFileNodes(self, graph, task):
-    fileNodeIDs = []
-
-    try: predecessors = graph.predecessors(task)
-    except:
-
-      #TODO SORT OUT ERROR MESSAGE.
-      print('failed')
-
-    for predecessor in predecessors:
-      if self.getGraphNodeAttribute(graph, predecessor, 'nodeType') == 'file': fileNodeIDs.append(predecessor)
-
-    return fileNodeIDs
+    return self.getTypedPredecessors(graph, task, 'file')
 
   # Get all successor file nodes for a task.
   def getSuccessorFileNodes(self, graph, task):
-    fileNodeIDs = []
-
-    try: successors = graph.successors(task)
-    except:
-
-      #TODO SORT OUT ERROR MESSAGE.
-      print('failed')
-
-    for successor in successors:
-      if self.getGraphNodeAttribute(graph, successor, 'nodeType') == 'file': fileNodeIDs.append(successor)
-
-    return fileNodeIDs
+    return self.getTypedSuccessors(graph, task, 'file')
 
   # Get all successor task nodes for an option/file node.
   def getSuccessorTaskNodes(self, graph, nodeID):
-    tasks = []
+    return self.getTypedSuccessors(graph, nodeID, 'task')
 
-    try: successors = graph.successors(nodeID)
-    except:
+  # Get the predecessors of a node that have the given node type. The neighbours are held in the node
+  # indexes as a tuple, and are returned as a new list, so the caller can modify the list.
+  def getTypedPredecessors(self, graph, nodeID, nodeType):
+    return list(self.getTypedNeighbours(graph, graph.pred, self.getNodeIndexes(graph).predecessors, nodeID).get(nodeType, ()))
+
+  # Get the successors of a node that have the given node type. The neighbours are held in the node
+  # indexes as a tuple, and are returned as a new list, so the caller can modify the list.
+  def getTypedSuccessors(self, graph, nodeID, nodeType):
+    return list(self.getTypedNeighbours(graph, graph.succ, self.getNodeIndexes(graph).successors, nodeID).get(nodeType, ()))
+
+  # Get the neighbours of a node, split by node type. If the neighbours have not been stored, or the
+  # number of neighbours has changed since they were, rebuild the entry.
+  def getTypedNeighbours(self, graph, adjacency, views, nodeID):
+    try: neighbours = adjacency[nodeID]
+    except KeyError:
 
       #TODO SORT OUT ERROR MESSAGE.
       print('failed')
+      self.errors.terminate()
+
+    if nodeID in views and views[nodeID][0] == len(neighbours): return views[nodeID][1]
 
-    for successor in successors:
-      if self.getGraphNodeAttribute(graph, successor, 'nodeType') == 'task': tasks.append(successor)
+    view = {}
+    for neighbour in neighbours:
+      nodeType = getattr(graph.node[neighbour].get('attributes'), 'nodeType', None)
+      if nodeType not in view: view[nodeType] = []
+      view[nodeType].append(neighbour)
+    view          = dict((nodeType, tuple(nodeIDs)) for nodeType, nodeIDs in view.items())
+    views[nodeID] = (len(neighbours), view)
 
-    return tasks
+    return view
+
+  # Remove the stored neighbours of a node.
+  def removeNeighbourViews(self, indexes, nodeID):
+    indexes.predecessors.pop(nodeID, None)
+    indexes.successors.pop(nodeID, None)
 
   # For a given file node, find the predecessor task.
   def getFilesPredecessorTask(self, graph, fileNodeID):
@@ -645,14 +739,12 @@ class nodeClass:
 
   # Determine if the supplied node has any predecessors.
   def hasPredecessor(self, graph, nodeID):
-    predecessorNodeIDs = graph.predecessors(nodeID)
-    if predecessorNodeIDs: return True
+    if graph.pred[nodeID]: return True
     else: return False
 
   # Determine if the supplied node has any successors.
   def hasSuccessor(self, graph, nodeID):
-    successorNodeIDs = graph.successors(nodeID)
-    if successorNodeIDs: return True
+    if graph.succ[nodeID]: return True
     else: return False
 
   # Get all of the file nodes associated with an option node.
@@ -665,11 +757,170 @@ class nodeClass:
       print(optionNodeID, 'nodeMethods.getAssociatedFileNodeIDs')
       self.errors.terminate()
 
-    fileNodeIDs = []
-    for nodeID in graph.nodes(data = False):
-      if self.getGraphNodeAttribute(graph, nodeID, 'nodeType') == 'file' and nodeID.startswith(optionNodeID + '_'): fileNodeIDs.append(nodeID)
+    # Return a copy of the list, so that the index is unaffected if the caller modifies the graph
+    # while looping over the file nodes.
+    indexes = self.getNodeIndexes(graph)
+    if optionNodeID in indexes.associatedFileNodes: return list(indexes.associatedFileNodes[optionNodeID])
+    else: return []
+
+  # Get the indexes associated with the graph. If the indexes do not exist (e.g. the graph was not built
+  # using these methods), or nodes have been added or removed without updating the indexes, build them.
+  def getNodeIndexes(self, graph):
+    try: indexes = graph.graph['nodeIndexes']
+    except KeyError: return self.buildNodeIndexes(graph)
+
+    if indexes.numberOfNodes != len(graph.node): return self.buildNodeIndexes(graph)
+    return indexes
+
+  # Record that the graph has been modified. Any method that modifies the graph, or the values of a
+  # node in place, must call this.
+  def markGraphModified(self, graph):
+    self.getNodeIndexes(graph).graphVersion += 1
+
+  # Build the node indexes by parsing all of the nodes in the graph.
+  def buildNodeIndexes(self, graph):
+    indexes = nodeIndexes()
+    for nodeID, data in graph.nodes_iter(data = True):
+      if 'attributes' in data: self.indexNode(indexes, nodeID, data['attributes'])
+
+    indexes.numberOfNodes = len(graph.node)
+    graph.graph['nodeIndexes'] = indexes
+
+    return indexes
+
+  # Add a node to the indexes.
+  def indexNode(self, indexes, nodeID, attributes):
+    nodeType = getattr(attributes, 'nodeType', None)
+    if nodeType not in indexes.nodes: indexes.nodes[nodeType] = OrderedDict()
+    indexes.nodes[nodeType][nodeID] = True
+    if getattr(attributes, 'isMarkedForRemoval', False): indexes.markedForRemoval.add(nodeID)
+
+    # File nodes are named after the option node with which they are associated.
+    if getattr(attributes, 'nodeType', None) == 'file':
+      optionNodeID = self.getOptionNodeIDFromFileNodeID(nodeID)
+      if optionNodeID not in indexes.associatedFileNodes: indexes.associatedFileNodes[optionNodeID] = []
+      indexes.associatedFileNodes[optionNodeID].append(nodeID)
+
+  # Remove a node from the indexes.
+  def unindexNode(self, indexes, nodeID, attributes):
+    nodeType = getattr(attributes, 'nodeType', None)
+    if nodeType in indexes.nodes: indexes.nodes[nodeType].pop(nodeID, None)
+    indexes.markedForRemoval.discard(nodeID)
+
+    if nodeType == 'file':
+      optionNodeID = self.getOptionNodeIDFromFileNodeID(nodeID)
+      fileNodeIDs  = indexes.associatedFileNodes.get(optionNodeID, [])
+      if nodeID in fileNodeIDs: fileNodeIDs.remove(nodeID)
+      if not fileNodeIDs: indexes.associatedFileNodes.pop(optionNodeID, None)
+
+  # Get the nodes of the given type connected to a task with the given argument.
+  def getTaskArgumentNodes(self, graph, task, argument, nodeType):
+    taskArguments = self.getTaskArgumentIndex(graph, task)
+    try: return taskArguments[nodeType][argument]
+    except KeyError: return []
+
+  # Get the argument index for a task. If the index for this task has not been built, or edges to
+  # the task have been added or removed without updating the index, build it.
+  def getTaskArgumentIndex(self, graph, task):
+    if task not in graph.pred: return {}
+
+    indexes = self.getNodeIndexes(graph)
+    if task not in indexes.taskArguments or indexes.numberOfTaskPredecessors[task] != len(graph.pred[task]):
+      indexes.taskArguments[task] = {}
+      for sourceNodeID in graph.pred[task]: self.addTaskArgument(graph, indexes.taskArguments[task], sourceNodeID, task)
+      indexes.numberOfTaskPredecessors[task] = len(graph.pred[task])
+
+    return indexes.taskArguments[task]
+
+  # Add the source node of an edge to a task argument index.
+  def addTaskArgument(self, graph, taskArguments, sourceNodeID, targetNodeID):
+    edgeData = graph.pred[targetNodeID][sourceNodeID]
+    nodeData = graph.node[sourceNodeID]
+    if 'attributes' in edgeData and 'attributes' in nodeData:
+      nodeType = getattr(nodeData['attributes'], 'nodeType', None)
+      argument = getattr(edgeData['attributes'], 'longFormArgument', None)
+      if nodeType not in taskArguments: taskArguments[nodeType] = {}
+      if argument not in taskArguments[nodeType]: taskArguments[nodeType][argument] = []
+      taskArguments[nodeType][argument].append(sourceNodeID)
+
+  # Add an edge to the graph and update the node indexes.
+  def addGraphEdge(self, graph, sourceNodeID, targetNodeID, attributes):
+    isNewEdge = not graph.has_edge(sourceNodeID, targetNodeID)
+    graph.add_edge(sourceNodeID, targetNodeID, attributes = attributes)
+    self.indexEdge(graph, sourceNodeID, targetNodeID, isNewEdge)
+
+  # Update the task argument index after an edge has been added to the graph. If the edge replaced an
+  # existing edge, or the index was already out of date, remove the entry and rebuild it when needed.
+  def indexEdge(self, graph, sourceNodeID, targetNodeID, isNewEdge):
+    indexes = self.getNodeIndexes(graph)
+    indexes.graphVersion += 1
+    indexes.successors.pop(sourceNodeID, None)
+    indexes.predecessors.pop(targetNodeID, None)
+    if targetNodeID not in indexes.taskArguments: return
+
+    if isNewEdge and indexes.numberOfTaskPredecessors[targetNodeID] == len(graph.pred[targetNodeID]) - 1:
+      self.addTaskArgument(graph, indexes.taskArguments[targetNodeID], sourceNodeID, targetNodeID)
+      indexes.numberOfTaskPredecessors[targetNodeID] += 1
+    else: self.removeTaskArgumentIndex(indexes, targetNodeID)
+
+  # Update the task argument index prior to an edge being removed from the graph.
+  def unindexEdge(self, graph, indexes, sourceNodeID, targetNodeID):
+    if targetNodeID not in indexes.taskArguments: return
+
+    if indexes.numberOfTaskPredecessors[targetNodeID] == len(graph.pred[targetNodeID]):
+      for nodeType in indexes.taskArguments[targetNodeID]:
+        for argument in indexes.taskArguments[targetNodeID][nodeType]:
+          if sourceNodeID in indexes.taskArguments[targetNodeID][nodeType][argument]:
+            indexes.taskArguments[targetNodeID][nodeType][argument].remove(sourceNodeID)
+      indexes.numberOfTaskPredecessors[targetNodeID] -= 1
+    else: self.removeTaskArgumentIndex(indexes, targetNodeID)
+
+  # Remove the argument index for a task.
+  def removeTaskArgumentIndex(self, indexes, task):
+    indexes.taskArguments.pop(task, None)
+    indexes.numberOfTaskPredecessors.pop(task, None)
+
+  # Remove an edge from the graph and update the task argument index.
+  def removeGraphEdge(self, graph, sourceNodeID, targetNodeID):
+    indexes = self.getNodeIndexes(graph)
+    self.unindexEdge(graph, indexes, sourceNodeID, targetNodeID)
+    indexes.successors.pop(sourceNodeID, None)
+    indexes.predecessors.pop(targetNodeID, None)
+    indexes.graphVersion += 1
+    graph.remove_edge(sourceNodeID, targetNodeID)
+
+  # Add a node to the graph and update the node indexes.
+  def addGraphNode(self, graph, nodeID, attributes):
+    indexes = self.getNodeIndexes(graph)
+
+    # If the node already exists, its attributes will be replaced, so remove the existing entries. The
+    # node type may change, so the stored neighbours of connected nodes are also removed.
+    if nodeID in graph.node:
+      if 'attributes' in graph.node[nodeID]: self.unindexNode(indexes, nodeID, graph.node[nodeID]['attributes'])
+      for neighbour in graph.pred[nodeID].keys() + graph.succ[nodeID].keys(): self.removeNeighbourViews(indexes, neighbour)
+    graph.add_node(nodeID, attributes = attributes)
+    self.indexNode(indexes, nodeID, attributes)
+    indexes.numberOfNodes = len(graph.node)
+    indexes.graphVersion += 1
+
+  # Remove a node from the graph and update the node indexes.
+  def removeGraphNode(self, graph, nodeID):
+    self.removeGraphNodes(graph, [nodeID])
+
+  # Remove a collection of nodes from the graph and update the node indexes. The argument indexes of
+  # any tasks connected to the removed nodes are removed and will be rebuilt when next required.
+  def removeGraphNodes(self, graph, nodeIDs):
+    indexes = self.getNodeIndexes(graph)
+    for nodeID in nodeIDs:
+      if 'attributes' in graph.node[nodeID]: self.unindexNode(indexes, nodeID, graph.node[nodeID]['attributes'])
+      for targetNodeID in graph.succ[nodeID]: self.removeTaskArgumentIndex(indexes, targetNodeID)
+      for neighbour in graph.pred[nodeID].keys() + graph.succ[nodeID].keys(): self.removeNeighbourViews(indexes, neighbour)
+      self.removeTaskArgumentIndex(indexes, nodeID)
+      self.removeNeighbourViews(indexes, nodeID)
 
-    return fileNodeIDs
+    graph.remove_nodes_from(nodeIDs)
+    indexes.numberOfNodes = len(graph.node)
+    indexes.graphVersion += 1
 
   # From a list of node IDs, find a node with a predecessor node. If more than one such node
   # is present in the list, return the first node ID encountered. If there are none, return 
@@ -696,22 +947,16 @@ class nodeClass:
       print('Unknown node type to remove - nodeMethods.purgeNodeMarkedForRemoval.')
       self.errors.terminate()
 
-    # Identify option nodes if required.
-    if typeToRemove == 'option' or typeToRemove == 'all': nodeIDs += self.getNodes(graph, 'option')
-
-    # Identify file nodes if required.
-    if typeToRemove == 'file' or typeToRemove == 'all': nodeIDs += self.getNodes(graph, 'file')
-
-    # Identify general nodes if required.
-    if typeToRemove == 'general' or typeToRemove == 'all': nodeIDs += self.getNodes(graph, 'general')
-
-    for nodeID in nodeIDs:
-      if self.getGraphNodeAttribute(graph, nodeID, 'isMarkedForRemoval'): graph.remove_node(nodeID)
+    # Find the nodes of the requested type that have been marked for removal and remove them.
+    allowedTypes = ['option', 'file', 'general'] if typeToRemove == 'all' else [typeToRemove]
+    for nodeID in self.getNodeIndexes(graph).markedForRemoval:
+      if self.getGraphNodeAttribute(graph, nodeID, 'nodeType') in allowedTypes: nodeIDs.append(nodeID)
+    self.removeGraphNodes(graph, nodeIDs)
 
   # Rename a node.  This involves creating a new node with the same attributes as the node being
   # removed.  Then reproduce all of the edges, before removing the old node.
   def renameNode(self, graph, tools, originalNodeID, newNodeID, allowNullArgument):
-    graph.add_node(newNodeID, attributes = graph.node[originalNodeID]['attributes'])
+    self.addGraphNode(graph, newNodeID, graph.node[originalNodeID]['attributes'])
 
     # Set all of the predecessor edges.
     predecessorNodeIDs = graph.predecessors(originalNodeID)
@@ -730,15 +975,14 @@ class nodeClass:
         attributes                   = edgeAttributes()
         attributes.longFormArgument  = None
         attributes.shortFormArgument = None
-        graph.add_edge(newNodeID, nodeID, attributes = attributes)
+        self.addGraphEdge(graph, newNodeID, nodeID, attributes)
 
     # Remove the original node.
-    graph.remove_node(originalNodeID)
+    self.removeGraphNode(graph, originalNodeID)
 
   # Check if a particular node is a predecessor to another node.
   def isPredecessor(self, graph, sourceNodeID, targetNodeID):
 
-    # Get the predecessors to the targetNodeID.
-    predecessorNodeIDs = graph.predecessors(targetNodeID)
-    if sourceNodeID in predecessorNodeIDs: return True
+    # Check the predecessors of the targetNodeID.
+    if sourceNodeID in graph.pred[targetNodeID]: return True
     else: return False
@@ -0,0 +1,246 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import fileOperations
+from fileOperations import *
+
+import stalenessPlanner
+from stalenessPlanner import *
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+# Define the version of the cache index. This must be incremented whenever the way in which entries are
+# keyed or recorded changes.
+cacheVersion = 1
+
+# Define a class for a local, content-addressed store of task outputs that is shared between runs. Each
+# entry is keyed on the identity of the tools, the resolved argument values and the contents of the input
+# files, and records the content hash of each output file. The output files are held in the store once,
+# named by their content hash, so identical outputs from different entries share the same object, and
+# are made read-only. Outputs are always copied into the store, so changes to an output after it is
+# stored do not change the stored object. If the key of a task is found, the outputs are copied from the
+# store instead of running the task. If useHardLinks is set, the outputs are hard linked to the objects
+# instead of copied. This avoids copying large files, but the outputs then share the file contents (and
+# the read-only permissions) with the store, so tools that modify their outputs in place will fail. Since
+# a linked output could still be modified (e.g. by a user able to ignore the permissions), the hashes of
+# the objects are checked before they are linked. If a maximum size (in bytes) is given, the least
+# recently used entries are removed once the objects in the store exceed the size. The index is read when
+# the store is opened and written by writeIndex (e.g. once the pipeline has run), so the store should only
+# be used by one run at a time.
+class outputCache:
+  def __init__(self, directory, maximumSize = None, hasher = None, useHardLinks = False):
+    self.errors         = configurationClassErrors()
+    self.fileOperations = fileOperations()
+    self.directory      = os.path.abspath(directory)
+    self.maximumSize    = maximumSize
+    self.hasher         = hasher if hasher else fileHasher()
+    self.useHardLinks   = useHardLinks
+
+    # Define the location of the index and of the stored objects.
+    self.indexFilename   = os.path.join(self.directory, 'index.json')
+    self.objectDirectory = os.path.join(self.directory, 'objects')
+
+    # The entries, keyed by key, each holding the hash of each output file and the time it was last used.
+    # The size of each object is stored, keyed by hash, along with the size, modification time and hash of
+    # each input file, so that unchanged inputs do not need to be hashed again.
+    self.entries = {}
+    self.objects = {}
+    self.files   = {}
+
+    # The cache is used by multiple threads when running the pipeline. Record if the index has been
+    # modified since it was last written.
+    self.lock       = threading.RLock()
+    self.isModified = False
+
+    # The maximum size may differ from that used when the entries were stored.
+    if os.path.exists(self.indexFilename):
+      self.readIndex()
+      if self.evict(): self.writeIndex()
+
+  # Read the index from file. An unreadable index, or an index from a different version, is ignored, so
+  # that the store is treated as empty.
+  def readIndex(self):
+    try:
+      with open(self.indexFilename) as filehandle: data = json.load(filehandle)
+    except (IOError, ValueError): return
+    if not isinstance(data, dict) or data.get('version') != cacheVersion: return
+
+    self.entries = data.get('entries', {})
+    self.objects = data.get('objects', {})
+    self.files   = data.get('files', {})
+
+  # Write the index to file if it has been modified. Return False if the index could not be written.
+  def writeIndex(self):
+    with self.lock:
+      if not self.isModified: return True
+      data = {'version': cacheVersion, 'entries': self.entries, 'objects': self.objects, 'files': self.files}
+      if not self.fileOperations.writeJsonFile(self.indexFilename, data): return False
+      self.isModified = False
+
+    return True
+
+  # Get the path of a file relative to a directory.
+  def getPath(self, filename, directory = None):
+    return os.path.abspath(os.path.join(directory, filename) if directory else filename)
+
+  # Get the path of the object holding a file with the given content hash.
+  def getObjectPath(self, fileHash):
+    return os.path.join(self.objectDirectory, fileHash[:2], fileHash)
+
+  # Get the key for a set of signatures (see getTaskSignatures) and input files. Return None if any of the
+  # input files are missing, or are directories, whose contents are not hashed.
+  def getKey(self, signatures, inputs, directory = None):
+    paths = [self.getPath(filename, directory) for filename in inputs]
+    with self.lock: knownFiles = dict((path, self.files[path]) for path in paths if path in self.files)
+    hashes = self.hasher.hashFiles(paths, knownFiles)
+    if any(hashes[path] == None or hashes[path][2] == 'directory' for path in paths): return None
+
+    with self.lock:
+      for path in paths:
+        if self.files.get(path) != hashes[path]:
+          self.files[path] = hashes[path]
+          self.isModified  = True
+
+    tools = [[signature['tool'], signature['arguments']] for signature in signatures]
+    data  = json.dumps([tools, sorted(hashes[path][2] for path in paths)], sort_keys = True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+  # Link or copy a file. The file is written to a temporary file which then replaces the target, so a
+  # partially written file is never seen. If the target is already a link to the source, there is nothing
+  # to do (and renaming a link over another link to the same file does nothing). The file is only linked
+  # if canLink is set. A copied file is made read-only if isReadOnly is set, and writable by the user
+  # otherwise.
+  def linkFile(self, source, target, isReadOnly, canLink):
+    if os.path.exists(target) and os.path.samefile(source, target): return
+
+    directory = os.path.dirname(target)
+    if not os.path.isdir(directory): os.makedirs(directory)
+    descriptor, temporaryFilename = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+    os.close(descriptor)
+    try:
+      os.remove(temporaryFilename)
+      isLinked = False
+      if canLink:
+        try:
+          os.link(source, temporaryFilename)
+          isLinked = True
+        except (AttributeError, OSError): pass
+      if not isLinked:
+        shutil.copy2(source, temporaryFilename)
+        mode = stat.S_IMODE(os.stat(temporaryFilename).st_mode)
+        if isReadOnly: os.chmod(temporaryFilename, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+        else: os.chmod(temporaryFilename, mode | stat.S_IWUSR)
+      self.fileOperations.replaceFile(temporaryFilename, target)
+    except (IOError, OSError):
+      try: os.remove(temporaryFilename)
+      except OSError: pass
+      raise
+
+  # Restore the output files for a key from the store. Return True if the key is in the store and all of
+  # the outputs were restored. The files are restored without holding the lock, so an object may be
+  # evicted while it is being restored, in which case the restore fails. If the outputs are linked, an
+  # object whose contents no longer match its hash is removed from the store, and the restore fails.
+  def restore(self, key, outputs, directory = None):
+    with self.lock:
+      entry = self.entries.get(key)
+      if not entry or sorted(entry['files']) != sorted(outputs): return False
+      files = list(entry['files'].items())
+
+    if self.useHardLinks:
+      for filename, fileHash in files:
+        if self.hasher.hashFile(self.getObjectPath(fileHash)) != fileHash:
+          with self.lock:
+            self.removeObject(fileHash)
+            self.isModified = True
+          return False
+
+    try:
+      for filename, fileHash in files: self.linkFile(self.getObjectPath(fileHash), self.getPath(filename, directory), False, self.useHardLinks)
+    except (IOError, OSError): return False
+
+    with self.lock:
+      if key in self.entries:
+        self.entries[key]['accessed'] = time.time()
+        self.isModified               = True
+
+    return True
+
+  # Store the output files for a key. Return False if any of the outputs are missing or are directories,
+  # or could not be added to the store.
+  def store(self, key, outputs, directory = None):
+    paths  = dict((filename, self.getPath(filename, directory)) for filename in outputs)
+    hashes = self.hasher.hashFiles(paths.values())
+    if any(hashes[path] == None or hashes[path][2] == 'directory' for path in paths.values()): return False
+
+    # Objects are named by their contents, so an object that is already present does not need to be
+    # written again.
+    files = {}
+    for filename, path in paths.items():
+      size, modificationTime, fileHash = hashes[path]
+      objectPath                       = self.getObjectPath(fileHash)
+      if not os.path.exists(objectPath):
+        try: self.linkFile(path, objectPath, True, False)
+        except (IOError, OSError): return False
+      files[filename] = fileHash
+
+    with self.lock:
+      for filename, fileHash in files.items(): self.objects[fileHash] = hashes[paths[filename]][0]
+      self.entries[key] = {'files': files, 'accessed': time.time()}
+      self.isModified   = True
+      self.evict()
+
+    return True
+
+  # Get the total size of the objects in the store.
+  def getSize(self):
+    return sum(self.objects.values())
+
+  # Remove the least recently used entries until the store is no larger than the maximum size. Objects no
+  # longer used by any entry are deleted. Return True if the store was modified.
+  def evict(self):
+    if self.maximumSize == None: return False
+
+    with self.lock:
+      size = self.getSize()
+      if size <= self.maximumSize: return False
+
+      # Count the number of entries using each object, so that an object can be deleted as soon as the
+      # last entry using it is removed. Objects not used by any entry are deleted first.
+      references = dict((fileHash, 0) for fileHash in self.objects)
+      for entry in self.entries.values():
+        for fileHash in entry['files'].values(): references[fileHash] = references.get(fileHash, 0) + 1
+      unusedObjects = [fileHash for fileHash, count in references.items() if count == 0]
+
+      # Remove the entries, starting with the least recently used.
+      keys = sorted(self.entries, key = lambda key: self.entries[key]['accessed'])
+      keys.reverse()
+      while True:
+        for fileHash in unusedObjects: size -= self.removeObject(fileHash)
+        if size <= self.maximumSize or not keys: break
+
+        unusedObjects = []
+        for fileHash in self.entries.pop(keys.pop())['files'].values():
+          references[fileHash] -= 1
+          if references[fileHash] == 0: unusedObjects.append(fileHash)
+      self.isModified = True
+
+    return True
+
+  # Remove an object from the store and return its size.
+  def removeObject(self, fileHash):
+    try: os.remove(self.getObjectPath(fileHash))
+    except OSError: pass
+
+    return self.objects.pop(fileHash, 0)
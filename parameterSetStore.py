@@ -0,0 +1,186 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import fileOperations
+from fileOperations import *
+
+from collections import OrderedDict
+
+import hashlib
+import json
+import os
+import sys
+
+# Define the version of the parameter set index. This must be incremented whenever the way in which the
+# parameter sets are indexed changes.
+parameterSetIndexVersion = 1
+
+# Define a class for storing the external parameter sets for a tool or pipeline. Each parameter set is
+# stored as a single line of json in a data file (<name>_parameterSets.jsonl), and an index file
+# (<name>_parameterSets.index) records the offset and length of each parameter set in the data file, so
+# that a parameter set can be read without reading the other parameter sets. New parameter sets are
+# appended to the data file and the index is then replaced. If a parameter set with the same ID is added,
+# it replaces the existing parameter set. The index records the size of the data file it describes, so an
+# index that does not match the data file (e.g. if the data file was modified by hand, or the index was
+# not written) is rebuilt. If there is no data file, the parameter sets are read from the original
+# parameter sets file (<name>_parameterSets.json). This file is converted to a data file when the first
+# new parameter set is added. The original file is left in place (it is often under version control), and
+# the index records the hash of the file it was converted from. Once converted, the original file is not
+# read, so if it is changed, it is ignored with a warning.
+class parameterSetStore:
+  def __init__(self, filename):
+    self.errors         = configurationClassErrors()
+    self.fileOperations = fileOperations()
+
+    # Define the original parameter sets file, the data file and the index file.
+    base                = filename[:-5] if filename.endswith('.json') else filename
+    self.jsonFilename   = filename
+    self.dataFilename   = base + '.jsonl'
+    self.indexFilename  = base + '.index'
+
+    # The index holds the [offset, length] of each parameter set, keyed by ID. The hash of the original
+    # parameter sets file that the data file was converted from is also stored.
+    self.index      = None
+    self.sourceHash = None
+
+    # Record if the original parameter sets file has been checked for changes since it was converted.
+    self.isJsonChecked = False
+
+  # Determine if any parameter sets are stored.
+  def exists(self):
+    return os.path.exists(self.dataFilename) or os.path.exists(self.jsonFilename)
+
+  # Get the index, reading it from file, or rebuilding it if it is missing or does not match the data file.
+  def getIndex(self):
+    if self.index != None: return self.index
+
+    try: dataSize = os.path.getsize(self.dataFilename)
+    except OSError: dataSize = None
+
+    # The hash of the original file is kept if the index is rebuilt.
+    try:
+      with open(self.indexFilename) as filehandle: data = json.load(filehandle)
+    except (IOError, ValueError): data = None
+    if isinstance(data, dict) and data.get('version') == parameterSetIndexVersion: self.sourceHash = data.get('sourceHash')
+    if isinstance(data, dict) and data.get('version') == parameterSetIndexVersion and data.get('dataSize') == dataSize:
+      self.index = data.get('parameterSets', {})
+    else:
+      self.index = self.buildIndex()
+      if dataSize != None: self.writeIndex(dataSize)
+
+    return self.index
+
+  # Build the index by reading the data file. A parameter set appearing more than once is replaced by the
+  # later instance.
+  def buildIndex(self):
+    index = {}
+    if not os.path.exists(self.dataFilename): return index
+
+    offset = 0
+    with open(self.dataFilename, 'rb') as filehandle:
+      for lineNumber, line in enumerate(filehandle):
+        text = line.rstrip(b'\r\n')
+        if text.strip():
+          try: parameterSetID = json.loads(text.decode('utf-8'))['ID']
+          except (KeyError, TypeError, ValueError):
+            self.errors.jsonError('Invalid parameter set on line ' + str(lineNumber + 1), self.dataFilename)
+          index[parameterSetID] = [offset, len(text)]
+        offset += len(line)
+
+    return index
+
+  # Write the index for a data file of the given size. Return False if the index could not be written.
+  def writeIndex(self, dataSize):
+    data = {'version': parameterSetIndexVersion, 'dataSize': dataSize, 'sourceHash': self.sourceHash, 'parameterSets': self.index}
+    return self.fileOperations.writeJsonFile(self.indexFilename, data)
+
+  # Read the parameter sets from the original parameter sets file.
+  def readJsonParameterSets(self):
+    if not os.path.exists(self.jsonFilename): return []
+    return self.fileOperations.readConfigurationFile(self.jsonFilename)['parameterSets']
+
+  # Get the hash of the contents of the original parameter sets file. Return None if the file cannot be read.
+  def getJsonHash(self):
+    try:
+      with open(self.jsonFilename, 'rb') as filehandle: return hashlib.sha1(filehandle.read()).hexdigest()
+    except (IOError, OSError): return None
+
+  # Warn if the original parameter sets file is present alongside a data file and has changed since it was
+  # converted, since it is not read.
+  def checkIgnoredJsonParameterSets(self):
+    if self.isJsonChecked or not os.path.exists(self.jsonFilename): return
+    self.getIndex()
+    if self.getJsonHash() != self.sourceHash: self.errors.ignoredParameterSetsFile(self.jsonFilename, self.dataFilename)
+    self.isJsonChecked = True
+
+  # Get the IDs of all of the stored parameter sets.
+  def getParameterSetIDs(self):
+    if not os.path.exists(self.dataFilename): return [parameterSet.get('ID') for parameterSet in self.readJsonParameterSets()]
+    self.checkIgnoredJsonParameterSets()
+    return sorted(self.getIndex().keys())
+
+  # Get the requested parameter sets, in the order requested. Parameter sets that are not stored are not
+  # included. If no IDs are given, all of the parameter sets are returned.
+  def getParameterSets(self, parameterSetIDs = None):
+    if parameterSetIDs != None: parameterSetIDs = list(OrderedDict((parameterSetID, True) for parameterSetID in parameterSetIDs))
+    if not os.path.exists(self.dataFilename):
+      parameterSets = self.readJsonParameterSets()
+      if parameterSetIDs == None: return parameterSets
+      return [parameterSet for parameterSetID in parameterSetIDs for parameterSet in parameterSets if parameterSet.get('ID') == parameterSetID]
+
+    self.checkIgnoredJsonParameterSets()
+    index = self.getIndex()
+    if parameterSetIDs == None: parameterSetIDs = sorted(index, key = lambda parameterSetID: index[parameterSetID][0])
+    parameterSets = []
+    with open(self.dataFilename, 'rb') as filehandle:
+      for parameterSetID in parameterSetIDs:
+        if parameterSetID not in index: continue
+        offset, length = index[parameterSetID]
+        filehandle.seek(offset)
+        try: parameterSets.append(json.loads(filehandle.read(length).decode('utf-8'), object_pairs_hook = OrderedDict))
+        except ValueError:
+          exc_type, exc_value, exc_traceback = sys.exc_info()
+          self.errors.jsonError(exc_value, self.dataFilename)
+
+    return parameterSets
+
+  # Convert the original parameter sets file to a data file. The original file is not modified, and the
+  # hash of its contents is recorded in the index.
+  def convertJsonParameterSets(self):
+    sourceHash = self.getJsonHash()
+    lines      = [self.getLine(parameterSet) for parameterSet in self.readJsonParameterSets()]
+    if not self.fileOperations.writeFileAtomically(self.dataFilename, lambda filehandle: filehandle.write(b''.join(lines))): return False
+    self.index      = self.buildIndex()
+    self.sourceHash = sourceHash
+
+    return self.writeIndex(os.path.getsize(self.dataFilename))
+
+  # Get the line of the data file holding a parameter set.
+  def getLine(self, parameterSet):
+    line = json.dumps(parameterSet, separators = (',', ':'))
+    if not isinstance(line, bytes): line = line.encode('utf-8')
+    return line + b'\n'
+
+  # Add a parameter set, replacing any parameter set with the same ID. The parameter set is appended to the
+  # data file, and the index is then replaced. Return False if the parameter set could not be added.
+  def addParameterSet(self, parameterSet):
+    if not os.path.exists(self.dataFilename) and os.path.exists(self.jsonFilename):
+      if not self.convertJsonParameterSets(): return False
+
+    index = self.getIndex()
+    line  = self.getLine(parameterSet)
+    try:
+      with open(self.dataFilename, 'ab') as filehandle:
+        filehandle.seek(0, os.SEEK_END)
+        offset = filehandle.tell()
+        filehandle.write(line)
+        filehandle.flush()
+        os.fsync(filehandle.fileno())
+    except (IOError, OSError): return False
+
+    index[parameterSet['ID']] = [offset, len(line) - 1]
+    return self.writeIndex(offset + len(line))
@@ -10,6 +10,9 @@ from configurationClassErrors import *
 import fileOperations
 from fileOperations import *
 
+import parameterSetStore
+from parameterSetStore import *
+
 from collections import OrderedDict
 
 import json
@@ -31,6 +34,26 @@ class parameterSetAttributes:
     # Record if the parameter set is held in the external parameter sets file.
     self.isExternal = False
 
+    # Index the nodes by argument. The index is built when first used, and must be rebuilt (using
+    # buildArgumentIndex) if the arguments of the nodes are modified.
+    self.argumentIndex = None
+
+  # Add a node to the parameter set.
+  def addNode(self, node):
+    self.nodes.append(node)
+    if self.argumentIndex != None: self.argumentIndex[node.argument] = node
+
+  # Build the index of nodes by argument. If multiple nodes set the same argument, the last node is used,
+  # since its values replace those of the earlier nodes.
+  def buildArgumentIndex(self):
+    self.argumentIndex = {}
+    for node in self.nodes: self.argumentIndex[node.argument] = node
+
+  # Get the node setting an argument, or None if the argument is not set by the parameter set.
+  def getNode(self, argument):
+    if self.argumentIndex == None: self.buildArgumentIndex()
+    return self.argumentIndex.get(argument)
+
   # Define a class to hold the parameter set information.
   class parameterSetNodeAttributes:
     def __init__(self):
@@ -38,11 +61,42 @@ class parameterSetAttributes:
       self.ID       = None
       self.values   = None
 
+# Define a class holding the values of arguments resolved from a series of layers (e.g. the gkno defaults,
+# the default parameter set, the requested parameter set and the command line). Each layer takes precedence
+# over the layers before it. The value and source of each argument are found as the layers are added, so
+# determining if an argument is set, and to what, does not require searching the layers.
+class layeredArguments:
+  def __init__(self):
+    self.layers  = []
+    self.values  = {}
+    self.sources = {}
+
+  # Add a layer of (argument, values).
+  def addLayer(self, name, arguments):
+    self.layers.append(name)
+    for argument, values in arguments:
+      self.values[argument]  = values
+      self.sources[argument] = name
+
+  # Determine if an argument is set in any of the layers.
+  def isSet(self, argument):
+    return argument in self.values
+
+  # Get the values of an argument, or None if the argument is not set.
+  def getValues(self, argument):
+    return self.values.get(argument)
+
+  # Get the name of the layer setting the argument, or None if the argument is not set.
+  def getSource(self, argument):
+    return self.sources.get(argument)
+
 class parameterSetConfiguration:
   def __init__(self):
 
-    # Define structures to hold parameter set information.
+    # Define structures to hold parameter set information, and the store of external parameter sets
+    # for each tool or pipeline.
     self.parameterSetAttributes = {}
+    self.parameterSetStores     = {}
 
     # Define the errors class.
     self.errors = configurationClassErrors()
@@ -131,7 +185,7 @@ class parameterSetConfiguration:
         observedArguments[node['argument']] = True
 
         # Store the node data using the argument as the key.
-        attributes.nodes.append(nodeAttributes)
+        attributes.addNode(nodeAttributes)
 
       # If this parameter set is in the external parameter set file, maek it as such.
       attributes.isExternal = isExternal
@@ -154,24 +208,16 @@ class parameterSetConfiguration:
 
   # Check that all the supplied arguments have their long forms.
   def getLongFormArguments(self, graph, edgeMethods, tools, pipeline, runName, isPipeline):
+    gknoArguments = self.getGknoArguments(graph, edgeMethods)
     for parameterSet in self.parameterSetAttributes[runName]:
       for nodeCount, node in enumerate(self.parameterSetAttributes[runName][parameterSet].nodes):
 
         # Get the long form of gkno specific arguments.
-        isGknoArgument = False
-        for nodeID in graph.predecessors('gkno'):
-          longFormArgument  = edgeMethods.getEdgeAttribute(graph, nodeID, 'gkno', 'longFormArgument')
-          shortFormArgument = edgeMethods.getEdgeAttribute(graph, nodeID, 'gkno', 'shortFormArgument')
-          if node.argument == longFormArgument:
-            isGknoArgument = True
-            break
-          elif node.argument == shortFormArgument:
-            node.argument  = longFormArgument
-            isGknoArgument = True
-            break
+        isGknoArgument = node.argument in gknoArguments
+        if isGknoArgument: node.argument = gknoArguments[node.argument]
 
         # Get the long form of pipeline arguments.
-        if not isGknoArgument:
+        else:
           originalArgument = node.argument
           if isPipeline: node.argument = str(pipeline.getLongFormArgument(graph, node.argument, False)[0])
           else: node.argument = str(tools.getLongFormArgument(runName, node.argument, False))
@@ -180,14 +226,51 @@ class parameterSetConfiguration:
         # valid. In this case, terminatem with a request that the configuration file is fixed.
         if node.argument == 'None': self.errors.invalidArgumentInParameterSet(runName, parameterSet, node.ID, originalArgument, isPipeline)
 
-  # Check for parameterSets in external parameterSets file.
-  def checkExternalParameterSets(self, graph, fileOperations, filename, runName, tools, isPipeline):
-    filename = filename.replace('.json', '_parameterSets.json')
+      # The arguments have been modified, so rebuild the index.
+      self.parameterSetAttributes[runName][parameterSet].buildArgumentIndex()
+
+  # Get the long form of each gkno specific argument, keyed by both the long and short forms. If an
+  # argument (long or short form) is used by gkno arguments with different long forms, the argument is
+  # ambiguous, so terminate.
+  def getGknoArguments(self, graph, edgeMethods):
+    gknoArguments = {}
+    for nodeID in graph.predecessors('gkno'):
+      longFormArgument  = edgeMethods.getEdgeAttribute(graph, nodeID, 'gkno', 'longFormArgument')
+      shortFormArgument = edgeMethods.getEdgeAttribute(graph, nodeID, 'gkno', 'shortFormArgument')
+      for argument in [longFormArgument, shortFormArgument]:
+        if argument == None: continue
+        if gknoArguments.setdefault(argument, longFormArgument) != longFormArgument:
+          self.errors.conflictingGknoArguments(argument, gknoArguments[argument], longFormArgument)
+
+    return gknoArguments
+
+  # Get the layered values of the arguments for a run: the gkno defaults, the default parameter set, the
+  # requested parameter set and the command line arguments, in increasing order of precedence. The gkno
+  # defaults and command line arguments are supplied as lists of (long form argument, values).
+  def getLayeredArguments(self, runName, parameterSetName, isPipeline, gknoDefaults = None, commandLineArguments = None):
+    parameterSets = self.parameterSetAttributes.get(runName, {})
+    if parameterSetName and parameterSetName not in parameterSets: self.errors.parameterSetNotLoaded(runName, parameterSetName, isPipeline)
+
+    layers = layeredArguments()
+    layers.addLayer('gkno', gknoDefaults or [])
+    if 'default' in parameterSets: layers.addLayer('default', [(node.argument, node.values) for node in parameterSets['default'].nodes])
+    if parameterSetName and parameterSetName != 'default':
+      layers.addLayer(parameterSetName, [(node.argument, node.values) for node in parameterSets[parameterSetName].nodes])
+    layers.addLayer('command line', commandLineArguments or [])
+
+    return layers
+
+  # Check for parameterSets in external parameterSets file. If the name of the requested parameter set is
+  # given, only the requested and default parameter sets are read and checked. Otherwise, all of the
+  # parameter sets are read.
+  def checkExternalParameterSets(self, graph, fileOperations, filename, runName, tools, isPipeline, parameterSetName = None):
+    store                            = parameterSetStore(filename.replace('.json', '_parameterSets.json'))
+    self.parameterSetStores[runName] = store
 
     # Check if the file exists (it's existence is not necessary).
-    if os.path.exists(filename):
-      configurationData = fileOperations.readConfigurationFile(filename)
-      self.checkParameterSets(graph, runName, configurationData['parameterSets'], isPipeline, isExternal = True)
+    if store.exists():
+      parameterSets = store.getParameterSets(None if parameterSetName == None else ['default', parameterSetName])
+      if parameterSets: self.checkParameterSets(graph, runName, parameterSets, isPipeline, isExternal = True)
 
   # Set a value in the toolAttributes.
   def setAttribute(self, attributes, attribute, value):
@@ -212,7 +295,7 @@ class parameterSetConfiguration:
 
     # Check that the parameter set exists.
     if parameterSetName not in self.parameterSetAttributes[runName]:
-      self.errors.missingParameterSet(runName, parameterSetName, isPipeline, self.parameterSetAttributes[runName].keys())
+      self.errors.missingParameterSet(runName, parameterSetName, isPipeline, self.getAvailableParameterSets(runName))
 
     for node in self.parameterSetAttributes[runName][parameterSetName].nodes:
       arguments.append((node.argument, node.values))
@@ -232,13 +315,21 @@ class parameterSetConfiguration:
     # All parameterSets from the extenal file have now been added to the data structure. If the parameter set still does
     # not exist, the the parameter set isn't defined.
     if parameterSetName not in self.parameterSetAttributes[name]:
-      self.errors.missingParameterSet(name, parameterSetName, isPipeline, self.parameterSetAttributes[name].keys())
+      self.errors.missingParameterSet(name, parameterSetName, isPipeline, self.getAvailableParameterSets(name))
 
-  # Write out the new configuration file and move to the config_files/pipes directory.
-  def writeNewConfigurationFile(self, arguments, path, filename, runName, parameterSetName):
+  # Get the names of all of the parameter sets available for a tool or pipeline. Only the requested
+  # external parameter sets are read, so the names of the others are taken from the parameter set store.
+  def getAvailableParameterSets(self, runName):
+    parameterSets = set(self.parameterSetAttributes.get(runName, {}).keys())
+    store         = self.parameterSetStores.get(runName)
+    if store and store.exists(): parameterSets.update(store.getParameterSetIDs())
 
-    # Open the new file.
-    filehandle = open(filename, 'w')
+    return sorted(parameterSets)
+
+  # Add the new parameter set to the external parameter sets in the config_files/pipes directory. The
+  # parameter set is appended to the parameter set store (see parameterSetStore), so the existing
+  # parameter sets are not rewritten.
+  def writeNewConfigurationFile(self, arguments, path, filename, runName, parameterSetName):
 
     # Add the new parameter set information to the parameterSetAttributes.
     attributes             = parameterSetAttributes()
@@ -256,39 +347,25 @@ class parameterSetConfiguration:
       nodeAttributes.argument  = str(argument)
       nodeAttributes.ID        = str('node' + str(counter))
       nodeAttributes.values    = values[1]
-      attributes.nodes.append(nodeAttributes)
+      attributes.addNode(nodeAttributes)
       counter += 1
 
-    # Put all of the parameter set information in a dictionary that can be dumped to a json file.
-    jsonParameterSets              = OrderedDict()
-    jsonParameterSets['parameterSets'] = []
-    for parameterSet in self.parameterSetAttributes[runName]:
-
-      # Only include parameterSets that were marked as external.
-      if self.parameterSetAttributes[runName][parameterSet].isExternal:
-        parameterSetInformation                = OrderedDict()
-        parameterSetInformation['ID']          = parameterSet
-        parameterSetInformation['description'] = self.parameterSetAttributes[runName][parameterSet].description
-        parameterSetInformation['nodes']       = []
-
-        # Set the nodes.
-        for node in self.parameterSetAttributes[runName][parameterSet].nodes:
-          nodeInformation              = OrderedDict()
-          nodeInformation['ID']        = node.ID
-          nodeInformation['argument']  = node.argument
-          nodeInformation['values']    = node.values
-          parameterSetInformation['nodes'].append(nodeInformation)
-
-        # Store this parameterSets data.
-        jsonParameterSets['parameterSets'].append(parameterSetInformation)
-
-    # Dump all the parameterSets to file.
-    json.dump(jsonParameterSets, filehandle, indent = 2)
-    filehandle.close()
-
-    # Move the configuration file.
-    shutil.copy(filename, path)
-    os.remove(filename)
+    # Put the parameter set information in a dictionary that can be dumped to json.
+    parameterSetInformation                = OrderedDict()
+    parameterSetInformation['ID']          = parameterSetName
+    parameterSetInformation['description'] = attributes.description
+    parameterSetInformation['nodes']       = []
+    for node in attributes.nodes:
+      nodeInformation              = OrderedDict()
+      nodeInformation['ID']        = node.ID
+      nodeInformation['argument']  = node.argument
+      nodeInformation['values']    = node.values
+      parameterSetInformation['nodes'].append(nodeInformation)
+
+    # Add the parameter set to the store in the configuration file directory.
+    storeFilename = os.path.join(path, os.path.basename(filename)) if os.path.isdir(path) else path
+    if not parameterSetStore(storeFilename).addParameterSet(parameterSetInformation):
+      self.errors.failedToWriteParameterSet(storeFilename, parameterSetName)
 
     print(file = sys.stdout)
     print('=' * 66, file = sys.stdout)
@@ -0,0 +1,361 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+from multiprocessing.pool import ThreadPool
+
+import heapq
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+try: import Queue as queue
+except ImportError: import queue
+
+try: from shlex import quote
+except ImportError: from pipes import quote
+
+# Define a class holding a unit of execution: an iteration of a fused task. All of the tasks in the
+# fused task are run together as a single shell pipeline.
+class executionUnit:
+  def __init__(self):
+
+    # The fused task and the iteration to run.
+    self.fusedTask = None
+    self.iteration = None
+
+    # The units that must complete before this unit can run, and the units that depend on this unit.
+    self.dependencies = set()
+    self.successors   = []
+
+    # The position of the unit in the workflow, used to choose between units that are ready to run.
+    self.position = None
+
+    # The return code of the pipeline once run.
+    self.returnCode = None
+
+  # Get the ID of the unit, (first task, iteration).
+  def getID(self):
+    return (self.fusedTask.tasks[0], self.iteration)
+
+# Define a class for running the pipeline on the local machine. Each iteration of each fused task (see
+# getFusedTasks) is run as a shell pipeline, with streams piped between the tasks and named pipes used
+# where a stream is read by multiple tasks. The dependencies between the iterations of the tasks are
+# given by the iteration graph, so greedy tasks wait for all iterations of their greedy inputs. Units are
+# run as soon as their dependencies are complete, with at most numberOfProcesses tasks running at a time.
+# Intermediate files are deleted once the task determined by setWhenToDeleteFiles, and any other units
+# reading the files, are complete. If a unit fails, no further units are started and the run stops once
+# the running units are complete. If an output cache is supplied, the outputs of a unit found in the cache
+# are restored instead of running the unit, and the outputs of units that are run are added to the cache.
+class pipelineExecutor:
+  def __init__(self, config, graph, numberOfProcesses = None, workingDirectory = None, logDirectory = None, shell = '/bin/bash', cache = None):
+    self.errors = configurationClassErrors()
+    self.config = config
+    self.graph  = graph
+
+    # Define the maximum number of tasks to run at the same time.
+    self.numberOfProcesses = numberOfProcesses if numberOfProcesses else multiprocessing.cpu_count()
+
+    # The directory in which to run the tasks and the directory to write the output of each unit. If
+    # no log directory is given, the output of the tasks is not redirected.
+    self.workingDirectory = workingDirectory
+    self.logDirectory     = logDirectory
+    self.shell            = shell
+
+    # Store the units, keyed by ID, and the units that are not to be run.
+    self.units        = {}
+    self.skippedUnits = set()
+
+    # Store the units that must complete before each intermediate file can be deleted, the files waiting
+    # for each unit and the files written by each unit.
+    self.fileHolders = {}
+    self.unitFiles   = {}
+    self.unitOutputs = {}
+
+    # Store the number of iterations of each task, and the iterations of the option nodes used by each
+    # iteration of each task (see getTaskIterations).
+    self.numberOfIterations = {}
+    self.selections         = {}
+
+    # Store the output cache, the signature of each iteration of each task (used to find the cache key
+    # of each unit) and the units whose outputs were restored from the cache.
+    self.cache       = cache
+    self.signatures  = {}
+    self.cachedUnits = set()
+
+    # The statuses of the files checked while building the pipeline (e.g. by the pre-flight checks) are
+    # used when hashing files for the cache. The statuses of the files written or deleted by each unit are
+    # removed once the unit has run.
+    self.fileStatuses = config.fileStatuses
+    if self.cache and not self.cache.hasher.statusCache: self.cache.hasher.statusCache = self.fileStatuses
+
+  # Build the units to run and the dependencies between them.
+  def buildUnits(self):
+    workflow                = self.config.pipeline.workflow
+    iterations              = self.config.getIterationGraph(self.graph)
+    self.numberOfIterations = iterations.numberOfIterations
+    if self.cache: self.signatures = self.config.getTaskSignatures(self.graph, iterations)
+    position                = dict((task, index) for index, task in enumerate(workflow))
+
+    # All of the tasks in a fused task are run together, so must have the same number of iterations.
+    chainOf = {}
+    for attributes in self.config.getFusedTasks(self.graph):
+      numbers = set(self.numberOfIterations[task] for task in attributes.tasks)
+      if len(numbers) > 1: self.errors.mismatchedStreamIterations(attributes.tasks, [self.numberOfIterations[task] for task in attributes.tasks])
+      for command in attributes.commands:
+        self.checkCommand(command)
+        self.selections[command.task] = dict(self.config.iterations.getTaskIterations(self.graph, command.task))
+
+      for task in attributes.tasks: chainOf[task] = attributes.tasks[0]
+      for iteration in range(1, self.numberOfIterations[attributes.tasks[0]] + 1):
+        unit           = executionUnit()
+        unit.fusedTask = attributes
+        unit.iteration = iteration
+        unit.position  = position[attributes.tasks[0]]
+        self.units[unit.getID()] = unit
+
+    for unitID, unit in self.units.items():
+      for task in unit.fusedTask.tasks:
+        for predecessorTask, predecessorIteration in iterations.getPredecessors(task, unit.iteration):
+          predecessorID = (chainOf[predecessorTask], predecessorIteration)
+          if predecessorID != unitID and predecessorID not in unit.dependencies:
+            unit.dependencies.add(predecessorID)
+            self.units[predecessorID].successors.append(unitID)
+
+    # Determine when to delete the intermediate files. Units run in parallel, so as well as the task
+    # identified by setWhenToDeleteFiles, all of the units reading a file must be complete before the file
+    # is deleted. Files listed for an iteration that the task does not have (e.g. the task is greedy) are
+    # deleted after the last iteration of the task.
+    intermediates = self.config.getGraphIntermediateFiles(self.graph, workflow)
+    deleteList    = self.config.setWhenToDeleteFiles(self.graph, intermediates)
+    for task in deleteList:
+      for iteration, filenames in deleteList[task].items():
+        for filename in filenames: self.fileHolders[filename] = set([(chainOf[task], min(iteration, self.numberOfIterations[task]))])
+
+    self.unitOutputs = dict((unitID, []) for unitID in self.units)
+    for task, iteration, inputs, outputs in self.config.iterations.iterateWorkflow(self.graph, workflow):
+      for filename in inputs:
+        if filename in self.fileHolders and (chainOf[task], iteration) in self.units: self.fileHolders[filename].add((chainOf[task], iteration))
+      if (chainOf[task], iteration) in self.units: self.unitOutputs[(chainOf[task], iteration)].extend(outputs)
+
+    self.unitFiles = dict((unitID, []) for unitID in self.units)
+    for filename, unitIDs in self.fileHolders.items():
+      for unitID in unitIDs: self.unitFiles[unitID].append(filename)
+
+    return self.units
+
+  # Run the pipeline. Return True if all of the units ran successfully. If a list of (task, iteration)
+  # is supplied (e.g. from the staleness planner), only the units containing those iterations are run and
+  # the other units are treated as complete. If supplied, the onComplete method is called with each unit
+  # that runs successfully, before its intermediate files are deleted.
+  def run(self, tasks = None, onComplete = None):
+    if not self.units: self.buildUnits()
+    if tasks != None:
+      tasks             = set(tasks)
+      self.skippedUnits = set(unitID for unitID, unit in self.units.items() if not any((task, unit.iteration) in tasks for task in unit.fusedTask.tasks))
+    else: self.skippedUnits = set()
+    self.cachedUnits = set()
+
+    dependencies = dict((unitID, len(unit.dependencies)) for unitID, unit in self.units.items())
+    available    = [(unit.position, unit.iteration, unitID) for unitID, unit in self.units.items() if not unit.dependencies]
+    heapq.heapify(available)
+
+    # The units are run using a pool of threads, each of which waits for the pipeline for a unit to
+    # complete. The number of tasks running is limited, with each unit counting as the number of tasks
+    # it contains (up to the maximum number of tasks).
+    pool           = ThreadPool(self.numberOfProcesses)
+    completedUnits = queue.Queue()
+    running        = 0
+    isFailed       = False
+    try:
+      while available or running:
+        while available and not isFailed:
+          unitID = available[0][2]
+          if unitID in self.skippedUnits:
+            heapq.heappop(available)
+            self.completeUnit(unitID, dependencies, available)
+            continue
+          if running + self.getNumberOfSlots(unitID) > self.numberOfProcesses: break
+
+          heapq.heappop(available)
+          running += self.getNumberOfSlots(unitID)
+          pool.apply_async(self.runUnit, (unitID,), callback = completedUnits.put)
+        if not running: break
+
+        unitID, returnCode = completedUnits.get()
+        running                        -= self.getNumberOfSlots(unitID)
+        self.units[unitID].returnCode   = returnCode
+        if returnCode != 0:
+          isFailed = True
+          continue
+
+        if onComplete: onComplete(self.units[unitID])
+        self.completeUnit(unitID, dependencies, available)
+
+    finally:
+      pool.close()
+      pool.join()
+
+      # The changes to the cache are written once all of the units have finished.
+      if self.cache: self.cache.writeIndex()
+
+    return all(unit.returnCode == 0 for unitID, unit in self.units.items() if unitID not in self.skippedUnits)
+
+  # Delete the intermediate files that are no longer required once a unit is complete, and make available
+  # the units whose dependencies are all complete.
+  def completeUnit(self, unitID, dependencies, available):
+    self.deleteFiles(unitID)
+    for successorID in self.units[unitID].successors:
+      dependencies[successorID] -= 1
+      if dependencies[successorID] == 0: heapq.heappush(available, (self.units[successorID].position, self.units[successorID].iteration, successorID))
+
+  # Get the number of tasks a unit counts as when limiting the number of tasks running.
+  def getNumberOfSlots(self, unitID):
+    return min(len(self.units[unitID].fusedTask.tasks), self.numberOfProcesses)
+
+  # Get the cache key of a unit and the output files to store or restore. The tasks in a unit are run
+  # together, and streamed files are not written to disk, so the key is built from the signatures of all
+  # of the tasks in the unit and the files the unit reads from disk. Return None for the key if the unit
+  # cannot be cached (e.g. it has no outputs, or an input is missing or is a directory).
+  def getCacheKey(self, unit):
+    signatures = [self.signatures[(task, unit.iteration)] for task in unit.fusedTask.tasks]
+    outputs    = sorted(set(filename for signature in signatures for filename in signature['outputs']))
+    inputs     = sorted(set(filename for signature in signatures for filename in signature['inputs']) - set(outputs))
+    if not outputs: return None, outputs
+
+    return self.cache.getKey(signatures, inputs, self.workingDirectory), outputs
+
+  # Run a unit, returning the unit ID and the return code. Any failure to run the unit is given a return
+  # code of -1, since an exception raised here would not be returned to the scheduler.
+  def runUnit(self, unitID):
+    unit          = self.units[unitID]
+    fifoDirectory = None
+    logFile       = None
+    try:
+      key = None
+      if self.cache:
+        key, outputs = self.getCacheKey(unit)
+        if key and self.cache.restore(key, outputs, self.workingDirectory):
+          self.removeFileStatuses(self.unitOutputs[unitID])
+          self.cachedUnits.add(unitID)
+          return unitID, 0
+
+      if unit.fusedTask.fanOuts: fifoDirectory = tempfile.mkdtemp(prefix = 'gkno_fifos_')
+      if self.logDirectory:
+        logFile = open(os.path.join(self.logDirectory, '_'.join([unit.fusedTask.tasks[0], str(unit.iteration)]) + '.log'), 'w')
+      process    = subprocess.Popen([self.shell, '-c', self.getScript(unit, fifoDirectory)], cwd = self.workingDirectory, stdout = logFile, stderr = logFile)
+      returnCode = process.wait()
+      self.removeFileStatuses(self.unitOutputs[unitID])
+      if returnCode == 0 and key: self.cache.store(key, outputs, self.workingDirectory)
+      return unitID, returnCode
+    except Exception: return unitID, -1
+    finally:
+      if logFile: logFile.close()
+      if fifoDirectory: shutil.rmtree(fifoDirectory, ignore_errors = True)
+
+  # Delete the intermediate files that are no longer required once a unit is complete.
+  def deleteFiles(self, unitID):
+    deletedFiles = []
+    for filename in self.unitFiles[unitID]:
+      self.fileHolders[filename].discard(unitID)
+      if not self.fileHolders[filename]:
+        try: os.remove(self.getPath(filename))
+        except OSError: pass
+        deletedFiles.append(filename)
+    self.removeFileStatuses(deletedFiles)
+
+  # Get the path of a file relative to the working directory.
+  def getPath(self, filename):
+    return os.path.join(self.workingDirectory, filename) if self.workingDirectory else filename
+
+  # Remove the cached statuses of files that have been written or deleted.
+  def removeFileStatuses(self, filenames):
+    self.fileStatuses.removeStatuses([self.getPath(filename) for filename in filenames])
+
+  # Get the shell script running a unit. The first task in the fused task starts the pipeline. A stream
+  # read by a single task is piped directly to the task, while the tasks reading a stream through named
+  # pipes are started in the background before the pipeline.
+  def getScript(self, unit, fifoDirectory = None):
+    commands = dict((command.task, command) for command in unit.fusedTask.commands)
+    fifos    = [quote(os.path.join(fifoDirectory, fifo)) for fifo in unit.fusedTask.getFifos()]
+    lines    = ['set -o pipefail', 'pids=""']
+    if fifos: lines.append('mkfifo ' + ' '.join(fifos))
+    for command in unit.fusedTask.commands:
+      if command.inputFifo: lines.append('( ' + self.getPipeline(unit, commands, command, fifoDirectory) + ' ) & pids="$pids $!"')
+    lines.append(self.getPipeline(unit, commands, unit.fusedTask.commands[0], fifoDirectory))
+    lines.append('status=$?')
+
+    # If the pipeline fails before opening the named pipes, the tasks reading them would wait forever, so
+    # open each named pipe to release them.
+    for fifo in fifos: lines.append(': <> ' + fifo)
+    lines.append('for pid in $pids; do wait $pid || status=1; done')
+    lines.append('exit $status')
+
+    return '\n'.join(lines) + '\n'
+
+  # Get the pipeline starting with a command.
+  def getPipeline(self, unit, commands, command, fifoDirectory):
+    text = self.getCommandLine(command, unit.iteration)
+    if command.inputFifo: text += ' < ' + quote(os.path.join(fifoDirectory, command.inputFifo))
+    if command.outputFifos: text += ' | tee ' + ' '.join([quote(os.path.join(fifoDirectory, fifo)) for fifo in command.outputFifos]) + ' > /dev/null'
+    elif command.outputStream:
+      for producer, fileNodeID, consumer in unit.fusedTask.streams:
+        if producer == command.task and fileNodeID == command.outputStream: text += ' | ' + self.getPipeline(unit, commands, commands[consumer], fifoDirectory)
+
+    return text
+
+  # Check that the command for a task can be written by getCommandLine. Each argument is written with its
+  # values as given in the graph, so arguments that are modified when the command line is written (e.g.
+  # filename stubs, or values evaluated when the task is run) are not supported.
+  def checkCommand(self, command):
+    tools = self.config.tools
+    for nodeID, data in self.graph.pred[command.task].items():
+      edge = data.get('attributes')
+      if getattr(edge, 'readJson', None): self.errors.unsupportedExecutorFeature(command.task, command.tool, None, 'json file read at execution time')
+      if getattr(edge, 'evaluateCommand', None): self.errors.unsupportedExecutorFeature(command.task, command.tool, None, 'command evaluated at execution time')
+
+    for optionNodeID in self.config.nodeMethods.getPredecessorOptionNodes(self.graph, command.task):
+      edge     = self.graph[optionNodeID][command.task]['attributes']
+      argument = edge.longFormArgument
+      if not argument or not edge.includeOnCommandLine or edge.isStreaming: continue
+
+      if edge.isFilenameStub: self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'filename stub')
+      if edge.modifyArgument: self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'modified argument')
+      if tools.getArgumentAttribute(command.tool, argument, 'commandToEvaluate') or tools.getArgumentAttribute(command.tool, argument, 'commandEvaluation').command:
+        self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'command evaluated at execution time')
+      if tools.getArgumentAttribute(command.tool, argument, 'inQuotations'):
+        self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'value in quotations')
+      if tools.getArgumentAttribute(command.tool, argument, 'isCommaSeparatedList'):
+        self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'comma separated list')
+      if tools.getArgumentAttribute(command.tool, argument, 'listValues'):
+        self.errors.unsupportedExecutorFeature(command.task, command.tool, argument, 'argument list')
+
+  # Get the command line for an iteration of a task. Flags are included if set, and arguments with multiple
+  # values are repeated for each value. Arguments replaced by streams are written with the replacement
+  # argument and value (see buildCommand).
+  def getCommandLine(self, command, iteration):
+    nodeMethods = self.config.nodeMethods
+    delimiter   = nodeMethods.getGraphNodeAttribute(self.graph, command.task, 'delimiter') or ' '
+    selections  = self.selections[command.task]
+    selection   = selections.get(iteration, selections.get(1, {}))
+
+    words = []
+    if command.precommand: words.append(command.precommand)
+    words.append(quote(os.path.join(command.path, command.executable) if command.path else command.executable))
+    if command.modifier: words.append(command.modifier)
+    for argument, nodeID, value in command.arguments:
+      if nodeID == None: words.append(argument + delimiter + quote(str(value)))
+      else:
+        values = self.config.iterations.getIterationValues(nodeMethods.getGraphNodeAttribute(self.graph, nodeID, 'values'), selection.get(nodeID, iteration))
+        if nodeMethods.getGraphNodeAttribute(self.graph, nodeID, 'dataType') == 'flag':
+          if 'set' in [str(value) for value in values]: words.append(argument)
+        else:
+          for value in values: words.append(argument + delimiter + quote(str(value)))
+
+    return ' '.join(words)
@@ -0,0 +1,175 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+from multiprocessing.pool import ThreadPool
+
+import multiprocessing
+import os
+import sys
+import threading
+
+# Define a class holding the status of a file: whether it exists, is a directory, can be read and
+# written, its size and its modification time.
+class fileStatus:
+  def __init__(self, filename):
+    self.filename         = filename
+    self.exists           = False
+    self.isDirectory      = False
+    self.isReadable       = False
+    self.isWritable       = False
+    self.size             = None
+    self.modificationTime = None
+
+# Define a class caching the status of files. The status of each file is found once, so that files
+# checked before the pipeline is built do not need to be checked again (each check can be slow on network
+# file systems). If files are created or removed, their statuses must be removed from the cache. The
+# statuses are stored by absolute path, so a file is only checked once however it is named.
+class fileStatusCache:
+  def __init__(self):
+    self.statuses = {}
+    self.lock     = threading.Lock()
+
+  # Find the status of a file.
+  def statFile(self, filename):
+    status = fileStatus(filename)
+    try: attributes = os.stat(filename)
+    except OSError: return status
+
+    status.exists           = True
+    status.isDirectory      = os.path.isdir(filename)
+    status.isReadable       = os.access(filename, os.R_OK)
+    status.isWritable       = os.access(filename, os.W_OK)
+    status.size             = attributes.st_size
+    status.modificationTime = attributes.st_mtime
+
+    return status
+
+  # Get the status of a file, using the cached status if available.
+  def getStatus(self, filename):
+    path = os.path.abspath(filename)
+    with self.lock: status = self.statuses.get(path)
+    if status: return status
+
+    status = self.statFile(path)
+    with self.lock: self.statuses[path] = status
+
+    return status
+
+  # Get the statuses of a collection of files, keyed by filename. Files that have not been checked are
+  # checked in parallel using a pool of threads.
+  def getStatuses(self, filenames, numberOfThreads = None):
+    paths = dict((filename, os.path.abspath(filename)) for filename in filenames)
+    with self.lock: toCheck = sorted(set(path for path in paths.values() if path not in self.statuses))
+    if toCheck:
+      numberOfThreads = min(numberOfThreads if numberOfThreads else multiprocessing.cpu_count(), len(toCheck))
+      pool            = ThreadPool(numberOfThreads)
+      try: statuses = pool.map(self.statFile, toCheck, max(1, len(toCheck) // (numberOfThreads * 4)))
+      finally:
+        pool.close()
+        pool.join()
+      with self.lock:
+        for status in statuses: self.statuses[status.filename] = status
+
+    with self.lock: return dict((filename, self.statuses[path]) for filename, path in paths.items())
+
+  # Remove files from the cache. If no files are given, the cache is cleared.
+  def removeStatuses(self, filenames = None):
+    with self.lock:
+      if filenames == None: self.statuses = {}
+      else:
+        for filename in filenames: self.statuses.pop(os.path.abspath(filename), None)
+
+# Define a class holding the results of the pre-flight checks. The problems found are stored by type,
+# each as a list of (node ID, filename). The size of each input file is also stored.
+class preflightReport:
+  def __init__(self):
+    self.problems = {}
+    self.sizes    = {}
+
+    # Store the number of input files, outputs and output directories checked.
+    self.numberOfInputs      = 0
+    self.numberOfOutputs     = 0
+    self.numberOfDirectories = 0
+
+  # Add a problem to the report.
+  def addProblem(self, problem, nodeID, filename):
+    if problem not in self.problems: self.problems[problem] = []
+    self.problems[problem].append((nodeID, filename))
+
+  # Get the problems of a given type.
+  def getProblems(self, problem):
+    return self.problems.get(problem, [])
+
+  # Determine if any problems were found.
+  def hasProblems(self):
+    return len(self.problems) > 0
+
+# Define a class for checking the files used by the pipeline before it is run. The input files (as given
+# by getGraphDependencies) are checked to ensure that they exist, can be read and have a valid extension.
+# If rejectEmptyFiles is set, empty input files are also reported. The outputs (as given by
+# getGraphOutputs) are checked to ensure that their directories exist and can be written to. Outputs that
+# must not already exist (e.g. to avoid overwriting previous results) can also be checked. All of the
+# files are checked in parallel, and all problems are returned in a single report, rather than
+# terminating at the first problem.
+class preflightChecker:
+  def __init__(self, nodeMethods, statusCache = None, numberOfThreads = None, rejectEmptyFiles = False):
+    self.errors           = configurationClassErrors()
+    self.nodeMethods      = nodeMethods
+    self.statusCache      = statusCache if statusCache else fileStatusCache()
+    self.numberOfThreads  = numberOfThreads
+    self.rejectEmptyFiles = rejectEmptyFiles
+
+  # Check the input files and outputs. The dependencies are a list of (file node ID, filename) and the
+  # outputs a list of (option node ID, filename). Outputs associated with an option node in
+  # terminateIfPresent must not already exist. Files used by multiple tasks are only checked once.
+  def checkFiles(self, graph, dependencies, outputs, terminateIfPresent = None):
+    dependencies               = sorted(set(dependencies))
+    outputs                    = sorted(set(outputs))
+    report                     = preflightReport()
+    report.numberOfInputs      = len(dependencies)
+    report.numberOfOutputs     = len(outputs)
+    directories                = sorted(set(os.path.dirname(filename) or os.curdir for nodeID, filename in outputs))
+    report.numberOfDirectories = len(directories)
+    checkOutputs               = [(nodeID, filename) for nodeID, filename in outputs if terminateIfPresent and nodeID in terminateIfPresent]
+
+    filenames = [filename for nodeID, filename in dependencies + checkOutputs] + directories
+    statuses  = self.statusCache.getStatuses(filenames, self.numberOfThreads)
+
+    for fileNodeID, filename in dependencies: self.checkInput(graph, report, fileNodeID, filename, statuses[filename])
+    for optionNodeID, filename in checkOutputs:
+      if statuses[filename].exists: report.addProblem('output present', optionNodeID, filename)
+
+    for directory in directories:
+      status = statuses[directory]
+      if not status.exists or not status.isDirectory: report.addProblem('missing output directory', None, directory)
+      elif not status.isWritable: report.addProblem('unwritable output directory', None, directory)
+
+    return report
+
+  # Check an input file.
+  def checkInput(self, graph, report, fileNodeID, filename, status):
+    optionNodeID = self.nodeMethods.getOptionNodeIDFromFileNodeID(fileNodeID)
+    isDirectory  = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'isDirectory') if optionNodeID in graph.node else False
+    if not status.exists: report.addProblem('missing', fileNodeID, filename)
+    elif not status.isReadable: report.addProblem('unreadable', fileNodeID, filename)
+    elif status.isDirectory != bool(isDirectory): report.addProblem('directory' if status.isDirectory else 'not a directory', fileNodeID, filename)
+    elif not isDirectory:
+      report.sizes[filename] = status.size
+      if self.rejectEmptyFiles and status.size == 0: report.addProblem('empty', fileNodeID, filename)
+
+    # Directories do not have extensions.
+    if not isDirectory and not self.hasValidExtension(graph, fileNodeID, optionNodeID, filename):
+      report.addProblem('invalid extension', fileNodeID, filename)
+
+  # Determine if a file has one of the extensions allowed for the node. Extensions may be supplied with
+  # or without the leading '.', and 'no extension' allows any file.
+  def hasValidExtension(self, graph, fileNodeID, optionNodeID, filename):
+    extensions = self.nodeMethods.getGraphNodeAttribute(graph, fileNodeID, 'allowedExtensions')
+    if not extensions and optionNodeID in graph.node: extensions = self.nodeMethods.getGraphNodeAttribute(graph, optionNodeID, 'allowedExtensions')
+    if not extensions or 'no extension' in extensions: return True
+
+    return any(filename.endswith('.' + str(extension).lstrip('.')) for extension in extensions)
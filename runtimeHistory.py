@@ -0,0 +1,116 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import fileOperations
+from fileOperations import *
+
+import json
+import os
+import sys
+
+# Define a class to hold the observed runtimes of a tool, either for all inputs or for inputs of
+# a particular size.
+class runtimeRecord:
+  def __init__(self):
+
+    # The number of runs observed.
+    self.numberOfRuns = 0
+
+    # The total wall-clock time (seconds) of the observed runs.
+    self.totalWallTime = 0.
+
+    # The largest peak memory (bytes) observed.
+    self.peakMemory = None
+
+  # Add an observed run.
+  def addRun(self, wallTime, peakMemory):
+    self.numberOfRuns  += 1
+    self.totalWallTime += wallTime
+    if peakMemory != None and (self.peakMemory == None or peakMemory > self.peakMemory): self.peakMemory = peakMemory
+
+  # Get the mean wall-clock time of the observed runs.
+  def getWallTime(self):
+    return self.totalWallTime / self.numberOfRuns
+
+# Define a class for storing the observed runtimes of tools. The history is stored as a json file
+# keyed by the tool ID. For each tool, runs are stored for all inputs, and additionally binned by
+# input size if the size was recorded. Bins are powers of two of the input size in bytes.
+class runtimeHistory:
+  def __init__(self, filename = None):
+    self.errors         = configurationClassErrors()
+    self.fileOperations = fileOperations()
+
+    # The file the history is read from and written to.
+    self.filename = filename
+
+    # The runtime records for each tool, keyed by tool ID and then by the input size bin. Runs for
+    # all input sizes are stored in the 'all' bin.
+    self.records = {}
+
+    if filename and os.path.exists(filename): self.readHistory()
+
+  # Read the history from file. An unreadable history is ignored, so that the history is rebuilt. Malformed
+  # entries (e.g. from editing the file by hand) are also ignored.
+  def readHistory(self):
+    try:
+      with open(self.filename) as filehandle: data = json.load(filehandle)
+    except (IOError, ValueError): return
+    if not isinstance(data, dict): return
+
+    for toolID in data:
+      if not isinstance(data[toolID], dict): continue
+      for sizeBin in data[toolID]:
+        record = runtimeRecord()
+        try:
+          record.numberOfRuns  = int(data[toolID][sizeBin]['runs'])
+          record.totalWallTime = float(data[toolID][sizeBin]['total wall time'])
+          record.peakMemory    = data[toolID][sizeBin]['peak memory']
+        except (KeyError, TypeError, ValueError): continue
+        if record.numberOfRuns < 1: continue
+
+        if toolID not in self.records: self.records[toolID] = {}
+        self.records[toolID][sizeBin] = record
+
+  # Write the history to file. Return False if the history could not be written.
+  def writeHistory(self):
+    data = {}
+    for toolID in self.records:
+      data[toolID] = {}
+      for sizeBin, record in self.records[toolID].items():
+        data[toolID][sizeBin] = {'runs': record.numberOfRuns, 'total wall time': record.totalWallTime, 'peak memory': record.peakMemory}
+
+    return self.fileOperations.writeJsonFile(self.filename, data)
+
+  # Get the bin for an input size. The bin is the largest power of two no larger than the size.
+  def getSizeBin(self, inputSize):
+    if inputSize == None: return 'all'
+    return str(int(inputSize).bit_length() - 1) if inputSize >= 1 else '0'
+
+  # Record an observed run of a tool.
+  def addRun(self, toolID, wallTime, peakMemory = None, inputSize = None):
+    if toolID not in self.records: self.records[toolID] = {}
+    for sizeBin in set(['all', self.getSizeBin(inputSize)]):
+      if sizeBin not in self.records[toolID]: self.records[toolID][sizeBin] = runtimeRecord()
+      self.records[toolID][sizeBin].addRun(wallTime, peakMemory)
+
+  # Get the record for a tool. If an input size is given and runs with inputs of a similar size have
+  # been observed, use those runs. Otherwise, use all runs. Return None if the tool has no runs.
+  def getRecord(self, toolID, inputSize = None):
+    if toolID not in self.records: return None
+    sizeBin = self.getSizeBin(inputSize)
+    if sizeBin in self.records[toolID]: return self.records[toolID][sizeBin]
+    return self.records[toolID].get('all')
+
+  # Get the expected wall-clock time of a tool. Return the default if the tool has no runs.
+  def getWallTime(self, toolID, inputSize = None, default = None):
+    record = self.getRecord(toolID, inputSize)
+    return record.getWallTime() if record else default
+
+  # Get the largest peak memory observed for a tool. Return None if this is not known.
+  def getPeakMemory(self, toolID, inputSize = None):
+    record = self.getRecord(toolID, inputSize)
+    return record.peakMemory if record else None
@@ -0,0 +1,246 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import fileOperations
+from fileOperations import *
+
+from multiprocessing.pool import ThreadPool
+
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+
+# Define the version of the manifest. This must be incremented whenever the information recorded for
+# each task, or the way in which it is recorded, changes.
+manifestVersion = 2
+
+# Define a class for finding the content hashes of files. Files are hashed in parallel using a pool of
+# threads, with each file read using memory-mapped I/O in blocks. The hashing releases the interpreter
+# lock for large blocks, so the threads hash files concurrently. If the size and modification time of
+# a file match those recorded when the file was last hashed, the recorded hash is used. If a file status
+# cache is supplied (see fileStatusCache), the sizes and modification times are taken from the cache, so
+# files already checked (e.g. by the pre-flight checks) are not checked again.
+class fileHasher:
+  def __init__(self, numberOfThreads = None, blockSize = 16 * 1024 * 1024, statusCache = None):
+    self.numberOfThreads = numberOfThreads if numberOfThreads else multiprocessing.cpu_count()
+    self.blockSize       = blockSize
+    self.statusCache     = statusCache
+
+  # Get the size and modification time of a file. Return None if the file does not exist.
+  def getFileStatus(self, filename):
+    if self.statusCache: return self.getCachedStatus(self.statusCache.getStatus(filename))
+
+    try: status = os.stat(filename)
+    except OSError: return None
+    return [status.st_size, status.st_mtime]
+
+  # Get the size and modification time of a file from its status in the file status cache.
+  def getCachedStatus(self, status):
+    return [status.size, status.modificationTime] if status.exists else None
+
+  # Get the hash of a file's contents. Directories are given the hash 'directory' and missing or unreadable
+  # files are given the hash None.
+  def hashFile(self, filename):
+    if os.path.isdir(filename): return 'directory'
+
+    fileHash = hashlib.sha1()
+    try:
+      with open(filename, 'rb') as filehandle:
+        size = os.fstat(filehandle.fileno()).st_size
+        if size > 0:
+          mappedFile = mmap.mmap(filehandle.fileno(), 0, access = mmap.ACCESS_READ)
+          try:
+            for offset in range(0, size, self.blockSize): fileHash.update(mappedFile[offset:offset + self.blockSize])
+          finally: mappedFile.close()
+    except (IOError, OSError, ValueError): return None
+
+    return fileHash.hexdigest()
+
+  # Hash a collection of files. Return a dictionary, keyed by filename, of [size, modification time,
+  # hash], or None if the file does not exist. Previously hashed files are supplied in the same form.
+  def hashFiles(self, filenames, knownFiles = None):
+    hashes    = {}
+    toHash    = []
+    filenames = set(filenames)
+    if self.statusCache:
+      cachedStatuses = self.statusCache.getStatuses(filenames, self.numberOfThreads)
+      statuses       = dict((filename, self.getCachedStatus(cachedStatuses[filename])) for filename in filenames)
+    else: statuses = dict((filename, self.getFileStatus(filename)) for filename in filenames)
+
+    for filename in filenames:
+      if statuses[filename] == None: hashes[filename] = None
+      elif knownFiles and knownFiles.get(filename) and knownFiles[filename][:2] == statuses[filename]: hashes[filename] = knownFiles[filename]
+      else: toHash.append(filename)
+
+    if toHash:
+      pool = ThreadPool(min(self.numberOfThreads, len(toHash)))
+      try:
+        for filename, fileHash in zip(toHash, pool.map(self.hashFile, toHash)):
+          hashes[filename] = statuses[filename] + [fileHash] if fileHash else None
+      finally:
+        pool.close()
+        pool.join()
+
+    return hashes
+
+# Define a class holding the manifest of completed tasks. For each iteration of each task, the manifest
+# records the identity of the tool, the argument values and the hashes of the input and output files
+# when the task was last run successfully. The size, modification time and hash of each file are also
+# recorded, so that unchanged files do not need to be hashed again. The manifest is stored as a json file.
+class taskManifest:
+  def __init__(self, filename = None):
+    self.fileOperations = fileOperations()
+    self.filename       = filename
+
+    # The records for each task, keyed by task and then iteration, and the known files.
+    self.tasks = {}
+    self.files = {}
+
+    if filename and os.path.exists(filename): self.readManifest()
+
+  # Read the manifest from file. An unreadable manifest, or a manifest from a different version, is
+  # ignored, so that all tasks are run.
+  def readManifest(self):
+    try:
+      with open(self.filename) as filehandle: data = json.load(filehandle)
+    except (IOError, ValueError): return
+    if not isinstance(data, dict) or data.get('version') != manifestVersion: return
+
+    self.tasks = data.get('tasks', {})
+    self.files = data.get('files', {})
+
+  # Write the manifest to file. Return False if the manifest could not be written.
+  def writeManifest(self):
+    return self.fileOperations.writeJsonFile(self.filename, {'version': manifestVersion, 'tasks': self.tasks, 'files': self.files})
+
+  # Get the record for an iteration of a task. Return None if the task has not been recorded.
+  def getRecord(self, task, iteration):
+    return self.tasks.get(task, {}).get(str(iteration))
+
+  # Record an iteration of a task.
+  def setRecord(self, task, iteration, record):
+    if task not in self.tasks: self.tasks[task] = {}
+    self.tasks[task][str(iteration)] = record
+
+# Define a class for determining which iterations of which tasks need to be run. An iteration of a task
+# is up to date if the manifest has a record for it, the tool and the argument values are unchanged, the
+# contents of the input files are unchanged and all of the output files exist. Any iteration that depends
+# on an iteration that is not up to date is also not up to date. Intermediate files that have been
+# deleted are treated as unchanged if the task producing them is up to date. If a task that needs to be
+# run uses a deleted intermediate file, the task producing the file is also run. Files are found relative
+# to the working directory (the directory the tasks are run in, see pipelineExecutor) if one is given, and
+# are recorded in the manifest by absolute path, so the planner can be used from any directory.
+class stalenessPlanner:
+  def __init__(self, config, graph, manifest, hasher = None, workingDirectory = None):
+    self.errors           = configurationClassErrors()
+    self.config           = config
+    self.graph            = graph
+    self.manifest         = manifest
+    self.hasher           = hasher if hasher else fileHasher(statusCache = config.fileStatuses)
+    self.workingDirectory = workingDirectory
+
+    # Store the signature (tool, arguments, input files and output files) of each iteration of each task.
+    self.signatures = {}
+
+  # Build the signature of each iteration of each task in the workflow.
+  def buildSignatures(self):
+    iterations      = self.config.getIterationGraph(self.graph)
+    self.signatures = self.config.getTaskSignatures(self.graph, iterations)
+
+    return iterations
+
+  # Get the path of a file relative to the working directory.
+  def getPath(self, filename):
+    return os.path.abspath(os.path.join(self.workingDirectory, filename) if self.workingDirectory else filename)
+
+  # Hash a collection of files, using the hashes of unchanged files recorded in the manifest. The hashes
+  # are returned keyed by filename (see fileHasher.hashFiles).
+  def hashFiles(self, filenames):
+    paths  = dict((filename, self.getPath(filename)) for filename in filenames)
+    hashes = self.hasher.hashFiles(paths.values(), self.manifest.files)
+
+    return dict((filename, hashes[path]) for filename, path in paths.items())
+
+  # Get the iterations of tasks that need to be run, as (task, iteration) in workflow order.
+  def getStaleTasks(self):
+    iterations = self.buildSignatures()
+    filenames  = [filename for signature in self.signatures.values() for filename in signature['inputs'] + signature['outputs']]
+    hashes     = self.hashFiles(filenames)
+
+    # Find the intermediate files that are deleted, and the iterations of the tasks producing them.
+    deletedFiles = {}
+    for record in self.config.getFileLifecycle(self.graph).records.values():
+      if record.getStatus() == 'delete':
+        for values in record.values.values():
+          for value in values: deletedFiles[value] = None
+    for taskIteration, signature in self.signatures.items():
+      for filename in signature['outputs']:
+        if filename in deletedFiles: deletedFiles[filename] = taskIteration
+
+    isStale      = {}
+    outputHashes = {}
+    for task, iteration in iterations.getNodes():
+      signature = self.signatures[(task, iteration)]
+      record    = self.manifest.getRecord(task, iteration)
+      stale     = record == None or record['tool'] != signature['tool'] or record['arguments'] != signature['arguments']
+      stale     = stale or any(isStale[predecessor] for predecessor in iterations.getPredecessors(task, iteration))
+
+      # Check that all of the outputs exist, other than intermediate files that are deleted.
+      if not stale:
+        for filename in signature['outputs']:
+          if hashes[filename] == None and filename not in deletedFiles: stale = True
+          outputHashes[filename] = hashes[filename][2] if hashes[filename] else record['outputs'].get(filename)
+
+      # Check that the inputs are unchanged. If a deleted intermediate file is missing, its hash is that
+      # recorded when the up to date task producing it was run.
+      if not stale:
+        for filename in signature['inputs']:
+          if hashes[filename]: inputHash = hashes[filename][2]
+          else: inputHash = outputHashes.get(filename) if filename in deletedFiles else None
+          if inputHash == None or record['inputs'].get(filename) != inputHash: stale = True
+
+      isStale[(task, iteration)] = stale
+
+    # Deleted intermediate files used by tasks that need to be run must be produced again.
+    toCheck = [taskIteration for taskIteration in isStale if isStale[taskIteration]]
+    while toCheck:
+      for filename in self.signatures[toCheck.pop()]['inputs']:
+        producer = deletedFiles.get(filename)
+        if producer and hashes[filename] == None and not isStale[producer]:
+          isStale[producer] = True
+          toCheck.append(producer)
+
+    return [taskIteration for taskIteration in iterations.getNodes() if isStale[taskIteration]]
+
+  # Record iterations of tasks that have been run successfully in the manifest, and write the manifest.
+  # Tasks should be recorded before their intermediate files are deleted (e.g. using the onComplete method
+  # of the pipeline executor). Otherwise, the last known hash of a deleted file is used. The outputs of the
+  # tasks have been written since their statuses may have been cached, so the cached statuses are removed.
+  # Return False if the manifest could not be written.
+  def recordTasks(self, tasks):
+    if not self.signatures: self.buildSignatures()
+    filenames = [filename for task in tasks for filename in self.signatures[task]['inputs'] + self.signatures[task]['outputs']]
+    self.config.fileStatuses.removeStatuses([self.getPath(filename) for task in tasks for filename in self.signatures[task]['outputs']])
+    hashes    = self.hashFiles(filenames)
+    for filename in hashes:
+      path = self.getPath(filename)
+      if hashes[filename]: self.manifest.files[path] = hashes[filename]
+      elif self.manifest.files.get(path): hashes[filename] = self.manifest.files[path]
+
+    for task, iteration in tasks:
+      signature            = self.signatures[(task, iteration)]
+      record               = {}
+      record['tool']       = signature['tool']
+      record['arguments']  = signature['arguments']
+      record['inputs']     = dict((filename, hashes[filename][2] if hashes[filename] else None) for filename in signature['inputs'])
+      record['outputs']    = dict((filename, hashes[filename][2] if hashes[filename] else None) for filename in signature['outputs'])
+      self.manifest.setRecord(task, iteration, record)
+
+    return self.manifest.writeManifest()
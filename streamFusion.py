@@ -0,0 +1,143 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import configurationClassErrors
+from configurationClassErrors import *
+
+import os
+import sys
+
+# Define a class holding the command for a task within a fused task. The arguments are a list of
+# (argument, option node ID, value) in the order in which they are to be written. If the option node
+# ID is set, the values of the option node are used. Otherwise, the value is used (e.g. the value
+# replacing an argument that has been replaced by a stream).
+class fusedCommand:
+  def __init__(self):
+
+    # The task and the tool it uses.
+    self.task = None
+    self.tool = None
+
+    # The components of the executable.
+    self.executable = None
+    self.modifier   = None
+    self.path       = None
+    self.precommand = None
+
+    # The arguments to write on the command line.
+    self.arguments = []
+
+    # The file nodes read from or written to a stream.
+    self.inputStream  = None
+    self.outputStream = None
+
+    # If the stream is read by multiple tasks, the output stream is copied to a named pipe (FIFO) for
+    # each of the tasks, and each task reads its stream from its named pipe.
+    self.inputFifo   = None
+    self.outputFifos = []
+
+# Define a class holding a set of tasks joined by streams, which are run together as a single process
+# group. The tasks are in the order in which they appear in the pipeline. A stream read by a single task
+# is piped directly to the task. A stream read by multiple tasks (a fan-out) is copied to a named pipe
+# for each task (e.g. using tee), so all of the tasks reading the stream must be started together. The
+# inputs and outputs are the file nodes read from or written to disk. The streams are listed as
+# (producing task, file node ID, consuming task) and the fan-outs as (producing task, file node ID,
+# consuming tasks, named pipes).
+class fusedTask:
+  def __init__(self):
+    self.tasks    = []
+    self.commands = []
+    self.inputs   = []
+    self.outputs  = []
+    self.streams  = []
+    self.fanOuts  = []
+
+  # Get the named pipes that must be created before the tasks are run.
+  def getFifos(self):
+    return [fifo for producer, fileNodeID, consumers, fifos in self.fanOuts for fifo in fifos]
+
+  # Determine if the fused task contains multiple tasks.
+  def isFused(self):
+    return len(self.tasks) > 1
+
+# Define a class for building fused tasks from chains of tasks joined by streaming edges. The streaming
+# edges are set by identifyStreamingNodes. A task reading a stream must have instructions for handling
+# the stream (the 'if input is stream' field) for the argument that receives the stream.
+class streamFusion:
+  def __init__(self, nodeMethods, edgeMethods, tools):
+    self.errors      = configurationClassErrors()
+    self.edgeMethods = edgeMethods
+    self.nodeMethods = nodeMethods
+    self.tools       = tools
+
+  # Build a fused task from a chain of tasks.
+  def buildFusedTask(self, graph, tasks):
+    attributes       = fusedTask()
+    attributes.tasks = list(tasks)
+    chainTasks       = set(tasks)
+    commands         = {}
+    for task in tasks:
+      command = self.buildCommand(graph, task)
+
+      # Inputs from tasks outside the chain, or that are not streamed, are read from disk.
+      for fileNodeID in self.nodeMethods.getPredecessorFileNodes(graph, task):
+        producers = [producer for producer in graph.pred[fileNodeID] if producer in chainTasks]
+        if producers and self.edgeMethods.getEdgeAttribute(graph, fileNodeID, task, 'isStreaming'):
+          command.inputStream = fileNodeID
+          attributes.streams.append((producers[0], fileNodeID, task))
+        elif fileNodeID not in attributes.inputs: attributes.inputs.append(fileNodeID)
+
+      # Outputs that are not streamed to tasks in the chain are written to disk.
+      for fileNodeID in self.nodeMethods.getSuccessorFileNodes(graph, task):
+        consumers = self.nodeMethods.getSuccessorTaskNodes(graph, fileNodeID)
+        if self.edgeMethods.getEdgeAttribute(graph, task, fileNodeID, 'isStreaming') and consumers and chainTasks.issuperset(consumers):
+          command.outputStream = fileNodeID
+          if len(consumers) > 1: attributes.fanOuts.append((task, fileNodeID, sorted(consumers), []))
+        else: attributes.outputs.append(fileNodeID)
+
+      commands[task] = command
+      attributes.commands.append(command)
+
+    # Define a named pipe for each task reading a stream that is read by multiple tasks.
+    for producer, fileNodeID, consumers, fifos in attributes.fanOuts:
+      for consumer in consumers:
+        fifo = self.getFifoName(fileNodeID, consumer)
+        fifos.append(fifo)
+        commands[producer].outputFifos.append(fifo)
+        commands[consumer].inputFifo = fifo
+
+    return attributes
+
+  # Get the name of the named pipe through which a task reads a stream.
+  def getFifoName(self, fileNodeID, task):
+    return fileNodeID + '.' + task + '.fifo'
+
+  # Build the command for a task. Arguments whose files are streamed are handled as described by the
+  # 'if input is stream' and 'if output to stream' fields of the tool configuration file. These either
+  # remove the argument, or replace it with a different argument and value.
+  def buildCommand(self, graph, task):
+    command            = fusedCommand()
+    command.task       = task
+    command.tool       = self.nodeMethods.getGraphNodeAttribute(graph, task, 'tool')
+    command.executable = self.nodeMethods.getGraphNodeAttribute(graph, task, 'executable')
+    command.modifier   = self.nodeMethods.getGraphNodeAttribute(graph, task, 'modifier')
+    command.path       = self.nodeMethods.getGraphNodeAttribute(graph, task, 'path')
+    command.precommand = self.nodeMethods.getGraphNodeAttribute(graph, task, 'precommand')
+
+    for optionNodeID in self.nodeMethods.getPredecessorOptionNodes(graph, task):
+      edge = graph[optionNodeID][task]['attributes']
+
+      # Edges that do not represent arguments (e.g. json files read at execution time) are not included.
+      if not edge.longFormArgument: continue
+
+      if edge.isStreaming:
+        instructions = edge.ifInputIsStream if edge.isInput else edge.ifOutputIsStream
+        if edge.isInput and not instructions: self.errors.noInputStreamInstructions(task, command.tool, edge.longFormArgument)
+        if instructions == 'replace':
+          replaceArgument = self.tools.getArgumentAttribute(command.tool, edge.longFormArgument, 'replaceArgument')
+          command.arguments.append((replaceArgument['argument'], None, replaceArgument['value']))
+
+      elif edge.includeOnCommandLine: command.arguments.append((edge.commandLineArgument, optionNodeID, None))
+
+    return command
@@ -0,0 +1,67 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outputCache
+from outputCache import *
+
+class testOutputCache(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.store     = os.path.join(self.directory, 'store')
+    self.write('output.txt', 'hello')
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  # Write a file in the working directory.
+  def write(self, filename, text, mode = 'w'):
+    with open(os.path.join(self.directory, filename), mode) as filehandle: filehandle.write(text)
+
+  # Read a file from the working directory.
+  def read(self, filename):
+    with open(os.path.join(self.directory, filename)) as filehandle: return filehandle.read()
+
+  # Changing an output after it is stored does not change the stored object, whether or not the outputs
+  # are linked.
+  def testStoreCopiesOutputs(self):
+    for useHardLinks in [False, True]:
+      self.write('output.txt', 'hello')
+      cache = outputCache(self.store, useHardLinks = useHardLinks)
+      self.assertTrue(cache.store('key', ['output.txt'], self.directory))
+      self.write('output.txt', ' CORRUPTED', 'a')
+
+      self.assertTrue(cache.restore('key', ['output.txt'], self.directory))
+      self.assertEqual(self.read('output.txt'), 'hello')
+      shutil.rmtree(self.store)
+
+  # A linked output that is modified changes the object, so the object is removed rather than restored.
+  def testModifiedObjectIsNotRestored(self):
+    cache = outputCache(self.store, useHardLinks = True)
+    self.assertTrue(cache.store('key', ['output.txt'], self.directory))
+    os.remove(os.path.join(self.directory, 'output.txt'))
+    self.assertTrue(cache.restore('key', ['output.txt'], self.directory))
+
+    path = os.path.join(self.directory, 'output.txt')
+    os.chmod(path, 0o644)
+    self.write('output.txt', ' CORRUPTED', 'a')
+    self.assertFalse(cache.restore('key', ['output.txt'], self.directory))
+    self.assertEqual(cache.getSize(), 0)
+
+    # Once the task is run again, its outputs can be stored and restored.
+    self.write('output.txt', 'hello')
+    self.assertTrue(cache.store('key', ['output.txt'], self.directory))
+    os.remove(path)
+    self.assertTrue(cache.restore('key', ['output.txt'], self.directory))
+    self.assertEqual(self.read('output.txt'), 'hello')
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+try: from StringIO import StringIO
+except ImportError: from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parameterSetStore
+from parameterSetStore import *
+
+# Get a parameter set with a single node.
+def getParameterSet(parameterSetID, value):
+  return {'ID': parameterSetID, 'description': 'test', 'nodes': [{'ID': 'node1', 'argument': '--in', 'values': [value]}]}
+
+class testParameterSetStore(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.filename  = os.path.join(self.directory, 'tool_parameterSets.json')
+    self.stderr    = sys.stderr
+    sys.stderr     = StringIO()
+
+  def tearDown(self):
+    sys.stderr = self.stderr
+    shutil.rmtree(self.directory)
+
+  # Write the original parameter sets file.
+  def writeJson(self, parameterSets):
+    with open(self.filename, 'w') as filehandle: json.dump({'parameterSets': parameterSets}, filehandle)
+
+  # Get the values of the requested parameter sets.
+  def getValues(self, store, parameterSetIDs = None):
+    return [parameterSet['nodes'][0]['values'][0] for parameterSet in store.getParameterSets(parameterSetIDs)]
+
+  # Parameter sets are appended, and adding a parameter set with an existing ID replaces it.
+  def testAddAndReplace(self):
+    store = parameterSetStore(self.filename)
+    self.assertFalse(store.exists())
+    self.assertTrue(store.addParameterSet(getParameterSet('a', 'one')))
+    self.assertTrue(store.addParameterSet(getParameterSet('b', 'two')))
+    self.assertTrue(store.addParameterSet(getParameterSet('a', 'three')))
+
+    store = parameterSetStore(self.filename)
+    self.assertEqual(store.getParameterSetIDs(), ['a', 'b'])
+    self.assertEqual(self.getValues(store, ['a']), ['three'])
+    self.assertEqual(self.getValues(store, ['b', 'missing', 'a']), ['two', 'three'])
+    self.assertEqual(self.getValues(store), ['two', 'three'])
+
+  # An index that does not match the data file is rebuilt.
+  def testStaleIndexIsRebuilt(self):
+    store = parameterSetStore(self.filename)
+    self.assertTrue(store.addParameterSet(getParameterSet('a', 'one')))
+    with open(store.dataFilename, 'ab') as filehandle: filehandle.write(store.getLine(getParameterSet('b', 'two')))
+
+    store = parameterSetStore(self.filename)
+    self.assertEqual(store.getParameterSetIDs(), ['a', 'b'])
+    self.assertEqual(self.getValues(store, ['b']), ['two'])
+    with open(store.indexFilename) as filehandle: self.assertEqual(json.load(filehandle)['dataSize'], os.path.getsize(store.dataFilename))
+
+  # The original parameter sets file is read until a parameter set is added. It is then converted, but
+  # left unchanged.
+  def testConversion(self):
+    self.writeJson([getParameterSet('a', 'one'), getParameterSet('b', 'two')])
+    with open(self.filename) as filehandle: contents = filehandle.read()
+    store = parameterSetStore(self.filename)
+    self.assertTrue(store.exists())
+    self.assertEqual(store.getParameterSetIDs(), ['a', 'b'])
+    self.assertTrue(store.addParameterSet(getParameterSet('c', 'three')))
+
+    with open(self.filename) as filehandle: self.assertEqual(filehandle.read(), contents)
+    store = parameterSetStore(self.filename)
+    self.assertEqual(store.getParameterSetIDs(), ['a', 'b', 'c'])
+    self.assertEqual(self.getValues(store), ['one', 'two', 'three'])
+    self.assertEqual(sys.stderr.getvalue(), '')
+
+  # If the original parameter sets file changes once converted, the changes are ignored with a warning,
+  # which is only given once.
+  def testChangedJsonIsIgnored(self):
+    self.writeJson([getParameterSet('a', 'one')])
+    self.assertTrue(parameterSetStore(self.filename).addParameterSet(getParameterSet('b', 'two')))
+    self.writeJson([getParameterSet('a', 'changed'), getParameterSet('d', 'four')])
+
+    store = parameterSetStore(self.filename)
+    self.assertEqual(store.getParameterSetIDs(), ['a', 'b'])
+    self.assertEqual(self.getValues(store, ['a']), ['one'])
+    self.assertEqual(sys.stderr.getvalue().count('WARNING'), 1)
+    self.assertTrue('Parameter sets file is ignored' in sys.stderr.getvalue())
+
+if __name__ == '__main__':
+  unittest.main()
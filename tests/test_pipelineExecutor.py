@@ -0,0 +1,147 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+
+import configurationClass
+from configurationClass import *
+
+import pipelineExecutor
+from pipelineExecutor import *
+
+# Define the location of the fixture pipeline. The tools are shell scripts, so the pipeline can be run
+# without installing any tools.
+fixtureDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'executor')
+
+# Build the graph for the fixture pipeline, with the input text files as the iterations of the --in
+# argument. If isStream is set, the upper task streams its output to the count task. The tools can be
+# modified (e.g. to use features that the executor does not support) before the graph is built.
+def buildPipeline(inputs, isWords = False, isStream = False, modifyTools = None):
+  config = configurationMethods()
+  tools  = {}
+  for tool in ['count', 'upper']:
+    tools[tool]         = config.fileOperations.readConfigurationFile(os.path.join(fixtureDirectory, tool + '.json'))
+    tools[tool]['path'] = fixtureDirectory
+  if modifyTools: modifyTools(tools)
+  for tool in sorted(tools): config.tools.processConfigurationData(tool, tools[tool], ['General'], True)
+
+  config.isPipeline = True
+  data              = config.fileOperations.readConfigurationFile(os.path.join(fixtureDirectory, 'pipeline.json'))
+  if isStream: data['tasks']['upper']['output to stream'] = True
+  config.pipeline.processConfigurationData(data, 'executor', [tool + '.json' for tool in tools], ['General'], True)
+  config.pipeline.checkCommonNodes(config.tools)
+
+  graph = nx.DiGraph()
+  tasks = sorted(config.pipeline.taskAttributes.keys())
+  config.buildTaskGraph(graph, tasks)
+  config.assignPipelineAttributes(graph, tasks)
+  config.mergeNodes(graph)
+  config.processOriginatingEdges(graph)
+  config.processAdditionalNodes(graph)
+  config.nodeMethods.getPipelineArgumentNodes(graph, config)
+  config.connectPipelineArgumentsFromAdditionalNodes(graph)
+  workflow                 = config.generateWorkflow(graph)
+  config.pipeline.workflow = config.correctWorkflowForStreams(graph, workflow)
+  config.nodeMethods.setRequiredNodes(graph, config.tools, config.pipeline.workflow)
+  config.identifyStreamingNodes(graph)
+
+  # Set the values of the option nodes and their file nodes. Each output is named after its input.
+  names = [os.path.splitext(filename)[0] for filename in inputs]
+  setValues(config, graph, '--in', inputs)
+  setValues(config, graph, '--upper', [name + '.upper.txt' for name in names])
+  setValues(config, graph, '--out', [name + '.count' for name in names])
+  config.nodeMethods.addValuesToGraphNode(graph, config.pipeline.pipelineArguments['--words'].ID, ['set' if isWords else 'unset'], write = 'replace')
+  config.getNumberOfDataSets(graph)
+
+  return config, graph
+
+# Set the values of a pipeline argument, one value for each iteration.
+def setValues(config, graph, argument, filenames):
+  values = dict((iteration, [filename]) for iteration, filename in enumerate(filenames, 1))
+  nodeID = config.pipeline.pipelineArguments[argument].ID
+  config.nodeMethods.replaceGraphNodeValues(graph, nodeID, dict(values))
+  for fileNodeID in config.nodeMethods.getAssociatedFileNodeIDs(graph, nodeID): config.nodeMethods.replaceGraphNodeValues(graph, fileNodeID, dict(values))
+
+class testPipelineExecutor(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    with open(os.path.join(self.directory, 'a.txt'), 'w') as filehandle: filehandle.write('one\ntwo\nthree\n')
+    with open(os.path.join(self.directory, 'b.txt'), 'w') as filehandle: filehandle.write('four five\n')
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  # Read a file from the working directory.
+  def readFile(self, filename):
+    with open(os.path.join(self.directory, filename)) as filehandle: return filehandle.read().strip()
+
+  # Each iteration is run with its own values, and intermediate files are deleted.
+  def testRun(self):
+    config, graph = buildPipeline(['a.txt', 'b.txt'])
+    executor      = pipelineExecutor(config, graph, numberOfProcesses = 2, workingDirectory = self.directory)
+
+    self.assertTrue(executor.run())
+    self.assertEqual(self.readFile('a.count'), '3')
+    self.assertEqual(self.readFile('b.count'), '1')
+    self.assertFalse(os.path.exists(os.path.join(self.directory, 'a.upper.txt')))
+    self.assertFalse(os.path.exists(os.path.join(self.directory, 'b.upper.txt')))
+
+  # Flags are included on the command line if set.
+  def testFlag(self):
+    config, graph = buildPipeline(['a.txt', 'b.txt'], isWords = True)
+    executor      = pipelineExecutor(config, graph, workingDirectory = self.directory)
+
+    self.assertTrue(executor.run())
+    self.assertEqual(self.readFile('a.count'), '3')
+    self.assertEqual(self.readFile('b.count'), '2')
+
+  # Tasks joined by a stream are run as a single pipeline, without writing the streamed file.
+  def testStream(self):
+    config, graph = buildPipeline(['a.txt', 'b.txt'], isStream = True)
+    executor      = pipelineExecutor(config, graph, workingDirectory = self.directory)
+
+    self.assertEqual(sorted(executor.buildUnits()), [('upper', 1), ('upper', 2)])
+    self.assertTrue(executor.run())
+    self.assertEqual(self.readFile('a.count'), '3')
+    self.assertEqual(self.readFile('b.count'), '1')
+
+  # The command line for each iteration uses the values for the iteration.
+  def testCommandLine(self):
+    config, graph = buildPipeline(['a.txt', 'b.txt'])
+    executor      = pipelineExecutor(config, graph)
+    units         = executor.buildUnits()
+
+    for iteration, name in [(1, 'a'), (2, 'b')]:
+      command = [command for unitID, unit in units.items() for command in unit.fusedTask.commands if command.task == 'count' and unit.iteration == iteration][0]
+      self.assertEqual(executor.getCommandLine(command, iteration), os.path.join(fixtureDirectory, 'count') + ' --in ' + name + '.upper.txt --out ' + name + '.count')
+
+  # Tools whose command lines cannot be written by the executor are rejected.
+  def testUnsupportedFeatures(self):
+    def addQuotations(tools): tools['count']['arguments']['inputs'][0]['include value in quotations'] = True
+    def addModifiedArgument(tools): tools['upper']['arguments']['inputs'][0]['modify argument name on command line'] = 'omit'
+    for modifyTools in [addQuotations, addModifiedArgument]:
+      config, graph = buildPipeline(['a.txt'], modifyTools = modifyTools)
+      executor      = pipelineExecutor(config, graph)
+      with self.assertRaises(SystemExit): executor.buildUnits()
+
+  # If a task fails, the run stops and reports the failure, and the output of the task is logged.
+  def testFailure(self):
+    config, graph = buildPipeline(['a.txt', 'missing.txt'])
+    executor      = pipelineExecutor(config, graph, workingDirectory = self.directory, logDirectory = self.directory)
+
+    self.assertFalse(executor.run())
+    self.assertNotEqual(executor.units[('upper', 2)].returnCode, 0)
+    self.assertEqual(executor.units[('count', 2)].returnCode, None)
+    self.assertTrue(os.path.exists(os.path.join(self.directory, 'upper_2.log')))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,59 @@
+#!/bin/bash/python
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pipelineExecutor
+from pipelineExecutor import *
+
+import stalenessPlanner
+from stalenessPlanner import *
+
+import test_pipelineExecutor
+
+class testStalenessPlanner(unittest.TestCase):
+  def setUp(self):
+    self.directory        = tempfile.mkdtemp()
+    self.workingDirectory = os.path.join(self.directory, 'work')
+    self.manifestFilename = os.path.join(self.directory, 'manifest.json')
+    self.currentDirectory = os.getcwd()
+    os.mkdir(self.workingDirectory)
+    with open(os.path.join(self.workingDirectory, 'a.txt'), 'w') as filehandle: filehandle.write('one\ntwo\n')
+    with open(os.path.join(self.workingDirectory, 'b.txt'), 'w') as filehandle: filehandle.write('three\n')
+
+  def tearDown(self):
+    os.chdir(self.currentDirectory)
+    shutil.rmtree(self.directory)
+
+  # Plan and run the pipeline in the working directory, recording the tasks that are run. Return the
+  # iterations of the tasks that were stale.
+  def runPipeline(self):
+    config, graph = test_pipelineExecutor.buildPipeline(['a.txt', 'b.txt'])
+    planner       = stalenessPlanner(config, graph, taskManifest(self.manifestFilename), workingDirectory = self.workingDirectory)
+    stale         = planner.getStaleTasks()
+    executor      = pipelineExecutor(config, graph, workingDirectory = self.workingDirectory)
+    self.assertTrue(executor.run(stale, onComplete = lambda unit: planner.recordTasks([(task, unit.iteration) for task in unit.fusedTask.tasks])))
+
+    return stale
+
+  # An unchanged pipeline run from a different directory has no stale tasks, and changing an input only
+  # makes the tasks using it stale.
+  def testRerunFromOtherDirectory(self):
+    os.chdir(self.directory)
+    self.assertEqual(len(self.runPipeline()), 4)
+
+    os.chdir(self.workingDirectory)
+    self.assertEqual(self.runPipeline(), [])
+
+    with open(os.path.join(self.workingDirectory, 'b.txt'), 'w') as filehandle: filehandle.write('four\n')
+    self.assertEqual(sorted(self.runPipeline()), [('count', 2), ('upper', 2)])
+
+if __name__ == '__main__':
+  unittest.main()
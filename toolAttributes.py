@@ -7,10 +7,18 @@ from copy import deepcopy
 import configurationClassErrors
 from configurationClassErrors import *
 
+import fileOperations
+from fileOperations import *
+
+import hashlib
 import json
 import os
 import sys
 
+# Define the version of the cached tool configuration data. This must be incremented whenever the
+# tool data structures or the validation of the configuration files change.
+toolCacheVersion = 1
+
 class toolAttributes:
   def __init__(self):
 
@@ -207,6 +215,59 @@ class toolConfiguration:
     self.configurationData    = {}
     self.filename             = None
 
+  # Read and process a tool configuration file. If a cache directory is supplied, the validated tool
+  # data is read from the cache if the configuration file is unchanged since the cache was written.
+  # Otherwise, the file is processed and the validated data is written to the cache.
+  def processConfigurationFile(self, tool, filename, allowedCategories, allowTermination, cacheDirectory = None):
+    key = None
+    if cacheDirectory:
+      key = self.getCacheKey(filename, allowedCategories)
+      if key and self.readCachedTool(tool, cacheDirectory, key): return True
+
+    data = fileOperations().readConfigurationFile(filename, allowTermination)
+    if data == False: return False
+    success = self.processConfigurationData(tool, data, allowedCategories, allowTermination)
+
+    # Only write valid tools to the cache.
+    if success and key: self.writeCachedTool(tool, cacheDirectory, key)
+
+    return success
+
+  # Generate the key identifying the cached data for a configuration file. This is the file path, size,
+  # modification time and content hash, along with the categories that were allowed when the file was
+  # validated and the cache version. If the file cannot be read, return None.
+  def getCacheKey(self, filename, allowedCategories):
+    try:
+      status = os.stat(filename)
+      with open(filename, 'rb') as filehandle: contentHash = hashlib.sha1(filehandle.read()).hexdigest()
+    except (IOError, OSError): return None
+
+    return (toolCacheVersion, os.path.abspath(filename), status.st_size, status.st_mtime, contentHash, sorted(allowedCategories))
+
+  # Get the path of the cache file for a configuration file.
+  def getCacheFilename(self, cacheDirectory, key):
+    return os.path.join(cacheDirectory, hashlib.sha1(key[1].encode('utf-8')).hexdigest() + '.pickle')
+
+  # Read the validated tool data from the cache. Any problem with the cache results in the data not
+  # being used, so that the configuration file is processed.
+  def readCachedTool(self, tool, cacheDirectory, key):
+    cachedData = fileOperations().readPickleFile(self.getCacheFilename(cacheDirectory, key))
+    if not cachedData or cachedData[0] != key: return False
+    data = cachedData[1]
+
+    self.availableTools[tool]     = tool
+    self.attributes[tool]         = data[0]
+    self.argumentAttributes[tool] = data[1]
+    self.longFormArguments[tool]  = data[2]
+    self.shortFormArguments[tool] = data[3]
+
+    return True
+
+  # Write the validated tool data to the cache. Failing to write the cache is not an error.
+  def writeCachedTool(self, tool, cacheDirectory, key):
+    data = (self.attributes[tool], self.argumentAttributes[tool], self.longFormArguments[tool], self.shortFormArguments[tool])
+    fileOperations().writePickleFile(self.getCacheFilename(cacheDirectory, key), (key, data))
+
   # Process the tool data.
   def processConfigurationData(self, tool, data, allowedCategories, allowTermination):
 